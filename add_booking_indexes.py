@@ -0,0 +1,16 @@
+from app.database import engine
+from app import models
+
+# Creates any index declared on the bookings, booking_audits and assets tables that an
+# existing database is missing (create_all only adds indexes together with new tables).
+
+def add_booking_indexes():
+    with engine.begin() as conn:
+        for model in (models.Booking, models.BookingAudit, models.Asset):
+            for index in model.__table__.indexes:
+                print(f"Ensuring {index.name}...")
+                index.create(conn, checkfirst=True)
+    print("Indexes up to date.")
+
+if __name__ == "__main__":
+    add_booking_indexes()
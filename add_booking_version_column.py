@@ -0,0 +1,28 @@
+import sqlite3
+import os
+
+db_path = 'backend/fhsa.db'
+if not os.path.exists(db_path) and os.path.exists('fhsa.db'):
+    db_path = 'fhsa.db'
+
+print(f"Connecting to {db_path}...")
+
+try:
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.execute("PRAGMA table_info(assets)")
+    columns = [row[1] for row in cursor.fetchall()]
+
+    if 'booking_version' not in columns:
+        print("Adding booking_version column...")
+        cursor.execute("ALTER TABLE assets ADD COLUMN booking_version INTEGER DEFAULT 0 NOT NULL")
+        conn.commit()
+        print("Column added successfully.")
+    else:
+        print("booking_version already exists.")
+
+except Exception as e:
+    print(f"Error: {e}")
+finally:
+    if 'conn' in locals() and conn: conn.close()
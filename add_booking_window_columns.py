@@ -0,0 +1,30 @@
+from sqlalchemy import inspect, text
+from app.database import engine
+from app import models, schema
+
+# Adds bookings.start_at / bookings.end_at, backfills them from the JSON `dates`
+# column and creates the (asset_id, status, start_at, end_at) index. The app also does this
+# at startup (app/schema.py, which lists the order of these scripts).
+
+def add_booking_window_columns():
+    columns = [c["name"] for c in inspect(engine).get_columns("bookings")]
+
+    with engine.begin() as conn:
+        for column in ("start_at", "end_at"):
+            if column not in columns:
+                print(f"Adding {column} column...")
+                conn.execute(text(f"ALTER TABLE bookings ADD COLUMN {column} DATETIME"))
+            else:
+                print(f"{column} already exists.")
+
+        filled, unparseable = schema.backfill_booking_windows(conn)
+        for booking_id in unparseable:
+            print(f"Booking {booking_id}: unparseable dates, left empty")
+        print(f"Backfilled {filled} of {filled + len(unparseable)} bookings.")
+
+        for index in models.Booking.__table__.indexes:
+            index.create(conn, checkfirst=True)
+    print("Schema update complete.")
+
+if __name__ == "__main__":
+    add_booking_window_columns()
@@ -0,0 +1,110 @@
+import csv
+import io
+from typing import List
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from . import crud, json_codec, schemas
+
+# Bulk asset import (POST /api/assets/import and seed_db).
+#
+# The input is read one record at a time: CSV with a header row of AssetCreate field names
+# (specs, images, duration_options and availability as JSON text, empty cells left out),
+# or JSON Lines with one asset object per line. Each record is validated on its own; valid
+# ones are inserted CHUNK_SIZE at a time through crud.create_assets, all in one transaction,
+# and invalid ones are reported by line number and skipped. With atomic=True any invalid
+# record rolls the whole import back instead.
+
+CHUNK_SIZE = 500
+# Lines reported individually; failures past this are only counted
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = ("csv", "ndjson")
+JSON_FIELDS = {"specs", "images", "duration_options", "availability"}
+
+
+def read_csv(text):
+    """(line, record) pairs from CSV text; record is a dict, or an error message."""
+    reader = csv.DictReader(text)
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip() for name in reader.fieldnames]
+    for row in reader:
+        if None in row:
+            yield reader.line_num, "more cells than header columns"
+            continue
+        record = {}
+        for name, value in row.items():
+            if value is None or not value.strip():
+                continue
+            if name in JSON_FIELDS:
+                try:
+                    value = json_codec.loads(value)
+                except json_codec.DecodeError:
+                    record = f"{name}: invalid JSON"
+                    break
+            record[name] = value
+        yield reader.line_num, record
+
+
+def read_ndjson(text):
+    """(line, record) pairs from JSON Lines text; blank lines are skipped."""
+    for line, raw in enumerate(text, 1):
+        if not raw.strip():
+            continue
+        try:
+            record = json_codec.loads(raw)
+        except json_codec.DecodeError:
+            yield line, "invalid JSON"
+            continue
+        yield line, record if isinstance(record, dict) else "expected a JSON object"
+
+
+def read(file, fmt: str):
+    """Records from a binary file object (an upload's spooled file) in `fmt`."""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    return read_csv(text) if fmt == "csv" else read_ndjson(text)
+
+
+def _messages(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in e['loc']) or 'record'}: {e['msg']}" for e in error.errors()]
+
+
+def import_assets(db: Session, records, atomic: bool = False) -> dict:
+    """Validate and insert (line, record) pairs; commits, or rolls back if atomic and any failed.
+    Returns the report (schemas.AssetImportReport)."""
+    report = {"created": 0, "failed": 0, "errors": [], "ids": []}
+    chunk = []
+
+    def fail(line, messages):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line, "errors": messages})
+
+    def flush():
+        # Once an atomic import has failed, the rest is only validated for the report
+        if not (atomic and report["failed"]):
+            report["ids"] += crud.create_assets(db, chunk)
+        chunk.clear()
+
+    try:
+        for line, record in records:
+            if isinstance(record, str):
+                fail(line, [record])
+                continue
+            try:
+                chunk.append(schemas.AssetCreate.model_validate(record))
+            except ValidationError as e:
+                fail(line, _messages(e))
+                continue
+            if len(chunk) >= CHUNK_SIZE:
+                flush()
+        flush()
+        if atomic and report["failed"]:
+            db.rollback()
+            report["ids"] = []
+        else:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    report["created"] = len(report["ids"])
+    return report
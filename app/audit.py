@@ -0,0 +1,125 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+from . import models
+from .database import engine
+
+# Booking audit trail writes.
+#
+# By default record()/record_many() insert the audit rows in the caller's transaction, so
+# they commit (or roll back) together with the change they describe: one commit per action,
+# and never a state change without its audit row.
+#
+# Write-behind, for high-volume deployments, trades that guarantee for fewer writes on the
+# request path. Rows are held on the session until it commits (a rolled back change still
+# leaves no audit), then queued in memory, and a background thread inserts the queue in one
+# batch every AUDIT_WRITE_BEHIND_MS. If the process dies, the audits of the last interval
+# are lost; that interval is the loss window, and it has to be set explicitly to enable the
+# mode. At most AUDIT_WRITE_BEHIND_MAX_ROWS rows are ever queued: past that, record() writes
+# in the caller's transaction again until the writer catches up, and a failed batch is only
+# queued again as far as the bound allows (the rest is logged and dropped).
+#
+#   AUDIT_WRITE_BEHIND_MS        loss window / flush interval in ms; 0 or unset = off
+#   AUDIT_WRITE_BEHIND_MAX_ROWS  bound on queued rows (1000)
+
+WRITE_BEHIND_MS = int(os.getenv("AUDIT_WRITE_BEHIND_MS", "0"))
+WRITE_BEHIND_MAX_ROWS = int(os.getenv("AUDIT_WRITE_BEHIND_MAX_ROWS", "1000"))
+
+logger = logging.getLogger(__name__)
+
+_PENDING = "pending_audits"  # Session.info key: rows waiting for the session to commit
+
+_queue = []
+_lock = threading.Lock()
+_writer = None
+
+
+def entry(booking_id: int, action: str, details=None, performed_by_id: int = None) -> dict:
+    return {
+        "booking_id": booking_id,
+        "action": action,
+        "details": details,
+        "performed_by_id": performed_by_id,
+        # Stamped now, not when a write-behind batch lands
+        "timestamp": datetime.utcnow(),
+    }
+
+
+def record(db: Session, booking_id: int, action: str, details=None, performed_by_id: int = None):
+    record_many(db, [entry(booking_id, action, details, performed_by_id)])
+
+
+def record_many(db: Session, entries: list):
+    """Audit rows (from entry()) for the caller's transaction; nothing is committed here."""
+    if not entries:
+        return
+    if WRITE_BEHIND_MS > 0 and len(_queue) + len(entries) <= WRITE_BEHIND_MAX_ROWS:
+        db.info.setdefault(_PENDING, []).extend(entries)
+        return
+    db.execute(insert(models.BookingAudit), entries)
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue(session):
+    if session.in_nested_transaction():
+        # A savepoint was released; the rows wait for the outer commit
+        return
+    entries = session.info.pop(_PENDING, None)
+    if entries:
+        with _lock:
+            _queue.extend(entries)
+        _start_writer()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard(session, transaction):
+    # Whatever a finished transaction left behind was rolled back or closed uncommitted
+    if transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+
+def _start_writer():
+    global _writer
+    if _writer is None:
+        with _lock:
+            if _writer is None:
+                _writer = threading.Thread(target=_run, name="audit-writer", daemon=True)
+                _writer.start()
+
+
+def _run():
+    while True:
+        time.sleep(WRITE_BEHIND_MS / 1000)
+        flush()
+
+
+def flush() -> int:
+    """Write every queued audit row now, in one transaction. Returns how many were written."""
+    with _lock:
+        batch = _queue[:]
+        del _queue[:]
+    if not batch:
+        return 0
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(models.BookingAudit), batch)
+    except Exception:
+        logger.exception("Audit write-behind flush failed", extra={"rows": len(batch)})
+        # Retried next interval, within the queue bound: rows queued since took their room,
+        # so the oldest of the batch may not fit. Those are dropped, and logged in full.
+        with _lock:
+            room = max(WRITE_BEHIND_MAX_ROWS - len(_queue), 0)
+            dropped = batch[:len(batch) - room]
+            _queue[:0] = batch[len(dropped):]
+        if dropped:
+            logger.error("Audit rows dropped: write-behind queue full", extra={"dropped": dropped})
+        return 0
+    return len(batch)
+
+
+atexit.register(flush)
@@ -3,9 +3,14 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from typing import Optional
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import asyncio
+import threading
+import time
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from . import crud, database
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud_async, database, schemas
 import os
 
 # JWT Configuration
@@ -13,15 +18,50 @@ SECRET_KEY = os.getenv("SECRET_KEY", "r3pl1t_s3cr3t_k3y_jwt") # Change in produc
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Password hashing pool: bcrypt runs on these threads (it releases the GIL), never on the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+# Requests allowed to wait for a free worker; beyond that, login is rejected with 503 straight away
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
 
+# Authenticated principals are cached per process, keyed by token subject. The cache saves
+# loading and validating the whole user on every request, not the database round trip: each
+# hit is checked against users.updated_at with a primary key lookup, so a change made through
+# any worker process (status, role, profile, deletion) takes effect on the next request.
+# Writes in this process also drop the entry at once. Limit: an edit made outside the app
+# that leaves updated_at alone is only seen once the entry expires, after the TTL (seconds).
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+
+_hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def _hash_in_pool(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return await asyncio.wrap_future(_hash_pool.submit(fn, *args))
+    finally:
+        _hash_slots.release()
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _hash_in_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _hash_in_pool(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -32,15 +72,58 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-# Dependency to get DB session (circular import avoidance if possible, or just import from database)
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> schemas.User:
+    user = await crud_async.get_user_by_email(db, email=email)
+    principal = schemas.User.model_validate(user) if user else None
+    hashed_password = user.password if user else None
+    # End the read so the pooled connection isn't held while the hash is checked
+    await db.rollback()
+    if not principal or not await verify_password_async(password, hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return principal
+
+_principals = OrderedDict() # email -> (expires_at, schemas.User, version), least recently used first
+_principal_emails = {} # user id -> email, for invalidation by id
+_principal_generation = 0
+_principal_lock = threading.Lock()
+
+def _cached_principal(email: str):
+    with _principal_lock:
+        entry = _principals.get(email)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _principals[email]
+            return None
+        _principals.move_to_end(email)
+        return entry[1], entry[2]
+
+def _cache_principal(email: str, principal: schemas.User, version: tuple, generation: int):
+    with _principal_lock:
+        # A write invalidated users while we were reading this one: it may be stale, don't keep it
+        if generation != _principal_generation or PRINCIPAL_CACHE_TTL <= 0:
+            return
+        _principals[email] = (time.monotonic() + PRINCIPAL_CACHE_TTL, principal, version)
+        _principals.move_to_end(email)
+        _principal_emails[principal.id] = email
+        while len(_principals) > PRINCIPAL_CACHE_SIZE:
+            _, (_, evicted, _) = _principals.popitem(last=False)
+            _principal_emails.pop(evicted.id, None)
+
+def invalidate_principal(user_id: int):
+    """Drop a user's cached principal; call after committing any change to that user."""
+    global _principal_generation
+    with _principal_lock:
+        _principal_generation += 1
+        email = _principal_emails.pop(user_id, None)
+        if email is not None:
+            _principals.pop(email, None)
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -53,10 +136,19 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = crud.get_user_by_email(db, email=email)
+    cached = _cached_principal(email)
+    if cached is not None:
+        principal, version = cached
+        # Still current unless another process changed (or deleted) the user since
+        if await crud_async.get_user_version(db, principal.id) == version:
+            return principal
+    generation = _principal_generation
+    user = await crud_async.get_user_by_email(db, email=email)
     if user is None:
         raise credentials_exception
-    return user
+    principal = schemas.User.model_validate(user)
+    _cache_principal(email, principal, (user.updated_at,), generation)
+    return principal
 
 async def get_current_active_user(current_user = Depends(get_current_user)):
     if current_user.status == "restricted": # Example check
@@ -0,0 +1,337 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, or_
+from datetime import datetime, date, timedelta, timezone
+from bisect import bisect_right
+from itertools import accumulate
+import threading
+import json
+from . import models
+
+try:
+    import numpy as np
+except ImportError:  # optional: calendars fall back to a pure-Python prefix sum
+    np = None
+
+# Statuses that hold inventory for the booked window
+ACTIVE_STATUSES = ["pending", "awaiting_payment", "paid", "in_possession", "overdue"]
+# Statuses where the unit is physically out, so it is unavailable "now" whatever the dates say
+POSSESSION_STATUSES = ["in_possession", "overdue"]
+
+# Booking windows are closed intervals: a booking ending at T still holds the unit at T
+_RESOLUTION = timedelta(microseconds=1)
+
+
+def parse_booking_dates(dates):
+    """Return (start, end) as naive UTC datetimes from a booking `dates` value, or None."""
+    if not dates:
+        return None
+    if isinstance(dates, str):
+        try:
+            dates = json.loads(dates)
+        except ValueError:
+            return None
+    if not isinstance(dates, dict) or "start" not in dates or "end" not in dates:
+        return None
+    try:
+        return to_utc(dates["start"]), to_utc(dates["end"])
+    except (TypeError, ValueError):
+        return None
+
+
+def to_utc(value):
+    """Normalise an ISO string or datetime to a naive UTC datetime."""
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class IntervalIndex:
+    """Step function of reserved units over time, built from (start, end, quantity) windows.
+
+    `load_at` is a binary search over the breakpoints and `peak` adds a sparse-table
+    range max on top, so both answer in O(log n) once the index is built.
+    """
+
+    def __init__(self, intervals):
+        deltas = {}
+        for start, end, quantity in intervals:
+            deltas[start] = deltas.get(start, 0) + quantity
+            stop = end + _RESOLUTION
+            deltas[stop] = deltas.get(stop, 0) - quantity
+
+        self.times = sorted(deltas)
+        self.loads = []
+        running = 0
+        for t in self.times:
+            running += deltas[t]
+            self.loads.append(running)
+
+        # sparse[k][i] == max(loads[i : i + 2**k])
+        self._sparse = [self.loads]
+        width = 1
+        while width * 2 <= len(self.loads):
+            prev = self._sparse[-1]
+            self._sparse.append([max(prev[i], prev[i + width]) for i in range(len(prev) - width)])
+            width *= 2
+
+    def load_at(self, at: datetime) -> int:
+        i = bisect_right(self.times, at) - 1
+        return self.loads[i] if i >= 0 else 0
+
+    def peak(self, start: datetime, end: datetime) -> int:
+        """Highest number of units reserved at any instant of [start, end]."""
+        hi = bisect_right(self.times, end) - 1
+        if hi < 0:
+            return 0
+        lo = max(bisect_right(self.times, start) - 1, 0)
+        k = (hi - lo + 1).bit_length() - 1
+        row = self._sparse[k]
+        return max(row[lo], row[hi - (1 << k) + 1])
+
+
+def sweep_peak(windows, start: datetime, end: datetime) -> int:
+    """Peak units reserved inside [start, end], sweeping only the windows that overlap it."""
+    events = []
+    for b_start, b_end, quantity, _status in windows:
+        events.append((max(b_start, start), quantity))
+        events.append((b_end + _RESOLUTION, -quantity))
+    # Releases sort before arrivals at the same instant, so back-to-back bookings don't stack
+    events.sort()
+    peak = running = 0
+    for _at, delta in events:
+        running += delta
+        peak = max(peak, running)
+    return peak
+
+
+class AssetAvailability:
+    """Interval indexes over one asset's active bookings."""
+
+    def __init__(self, rows):
+        # rows: iterable of (start, end, quantity, status)
+        windows = []
+        held = []
+        self.held_units = 0
+        for start, end, quantity, status in rows:
+            windows.append((start, end, quantity))
+            if status in POSSESSION_STATUSES:
+                held.append((start, end, quantity))
+                self.held_units += quantity
+        self.windows = IntervalIndex(windows)
+        self.held = IntervalIndex(held)
+
+    def reserved_now(self, now: datetime) -> int:
+        # Units out with a customer count regardless of their window; everything else only inside it
+        return self.windows.load_at(now) - self.held.load_at(now) + self.held_units
+
+    def reserved_between(self, start: datetime, end: datetime) -> int:
+        return self.windows.peak(start, end)
+
+    def changed_at(self, now: datetime):
+        """Last instant up to `now` where reserved_now() could have changed, or None."""
+        latest = None
+        for index in (self.windows, self.held):
+            i = bisect_right(index.times, now) - 1
+            if i >= 0 and (latest is None or index.times[i] > latest):
+                latest = index.times[i]
+        return latest
+
+
+# Per-process cache of asset_id -> (booking_version, AssetAvailability). Every booking write
+# bumps Asset.booking_version in its own transaction, so an entry is valid exactly while the
+# version it was built under is current, in this process or any other.
+_indexes = {}
+_lock = threading.Lock()
+
+
+def overlaps(start: datetime, end: datetime):
+    """SQL predicate for bookings whose window intersects [start, end]."""
+    return and_(models.Booking.start_at <= end, models.Booking.end_at >= start)
+
+
+def _active_windows(db: Session, asset_id: int, *criteria):
+    # Served by ix_bookings_asset_window (asset_id, status, start_at, end_at)
+    return db.query(
+        models.Booking.start_at, models.Booking.end_at, models.Booking.quantity, models.Booking.status
+    ).filter(
+        models.Booking.asset_id == asset_id,
+        models.Booking.status.in_(ACTIVE_STATUSES),
+        models.Booking.start_at.isnot(None),
+        *criteria
+    ).all()
+
+
+def _active_windows_by_asset(db: Session, asset_ids, *criteria):
+    """One query for the active windows of many assets, grouped by asset_id."""
+    grouped = {asset_id: [] for asset_id in asset_ids}
+    if not grouped:
+        return grouped
+    rows = db.query(
+        models.Booking.asset_id, models.Booking.start_at, models.Booking.end_at,
+        models.Booking.quantity, models.Booking.status
+    ).filter(
+        models.Booking.asset_id.in_(grouped),
+        models.Booking.status.in_(ACTIVE_STATUSES),
+        models.Booking.start_at.isnot(None),
+        *criteria
+    ).all()
+    for asset_id, start, end, quantity, status in rows:
+        grouped[asset_id].append((start, end, quantity, status))
+    return grouped
+
+
+def load_index(db: Session, asset_id: int) -> AssetAvailability:
+    return AssetAvailability(_active_windows(db, asset_id))
+
+
+def _cached(asset: models.Asset):
+    entry = _indexes.get(asset.id)
+    if entry is not None and entry[0] == asset.booking_version:
+        return entry[1]
+    return None
+
+
+def get_index(db: Session, asset: models.Asset) -> AssetAvailability:
+    index = _cached(asset)
+    if index is None:
+        index = load_index(db, asset.id)
+        with _lock:
+            _indexes[asset.id] = (asset.booking_version, index)
+    return index
+
+
+def get_indexes(db: Session, assets) -> dict:
+    """Indexes for a page of assets; every cache miss is loaded in a single bulk query."""
+    indexes = {}
+    missing = {}
+    for asset in assets:
+        index = _cached(asset)
+        if index is None:
+            missing[asset.id] = asset.booking_version
+        else:
+            indexes[asset.id] = index
+    if missing:
+        loaded = {
+            asset_id: AssetAvailability(rows)
+            for asset_id, rows in _active_windows_by_asset(db, list(missing)).items()
+        }
+        with _lock:
+            for asset_id, index in loaded.items():
+                _indexes[asset_id] = (missing[asset_id], index)
+        indexes.update(loaded)
+    return indexes
+
+
+def invalidate(asset_id: int = None):
+    """Drop the cached index for one asset, or all of them."""
+    with _lock:
+        if asset_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(asset_id, None)
+
+
+def free_now(db: Session, asset: models.Asset, now: datetime = None) -> int:
+    now = now or datetime.utcnow()
+    return max(0, asset.total_quantity - get_index(db, asset).reserved_now(now))
+
+
+def free_now_direct(db: Session, asset: models.Asset, now: datetime = None) -> int:
+    """free_now() with one aggregate query instead of the asset's index, for callers that
+    have just changed the asset's bookings: the cached index is stale then, and rebuilding
+    it reads every active booking of the asset."""
+    now = now or datetime.utcnow()
+    reserved = db.query(func.coalesce(func.sum(models.Booking.quantity), 0)).filter(
+        models.Booking.asset_id == asset.id,
+        models.Booking.status.in_(ACTIVE_STATUSES),
+        models.Booking.start_at.isnot(None),
+        # As in reserved_now(): units out with a customer count regardless of their window
+        or_(models.Booking.status.in_(POSSESSION_STATUSES), overlaps(now, now)),
+    ).scalar()
+    return max(0, asset.total_quantity - reserved)
+
+
+def free_now_many(db: Session, assets, now: datetime = None) -> dict:
+    """asset_id -> units free now for a whole list of assets, in at most one query."""
+    now = now or datetime.utcnow()
+    indexes = get_indexes(db, assets)
+    return {
+        asset.id: max(0, asset.total_quantity - indexes[asset.id].reserved_now(now))
+        for asset in assets
+    }
+
+
+def changed_at_many(db: Session, assets, now: datetime = None):
+    """Latest time up to `now` at which the free-now count of any of `assets` moved on its own."""
+    now = now or datetime.utcnow()
+    times = [t for t in (index.changed_at(now) for index in get_indexes(db, assets).values()) if t]
+    return max(times, default=None)
+
+
+def free_between_many(db: Session, assets, start: datetime, end: datetime) -> dict:
+    """asset_id -> units free for the whole of [start, end], for a list of assets in one query."""
+    start, end = to_utc(start), to_utc(end)
+    windows = _active_windows_by_asset(db, [asset.id for asset in assets], overlaps(start, end))
+    return {
+        asset.id: max(0, asset.total_quantity - sweep_peak(windows[asset.id], start, end))
+        for asset in assets
+    }
+
+
+def free_between(db: Session, asset: models.Asset, start: datetime, end: datetime) -> int:
+    """Units free for the whole of [start, end], read straight from the database.
+
+    Admission checks use this rather than the cached index: only the bookings
+    overlapping the window are fetched, through the composite index.
+    """
+    start, end = to_utc(start), to_utc(end)
+    window = AssetAvailability(_active_windows(db, asset.id, overlaps(start, end)))
+    return max(0, asset.total_quantity - window.reserved_between(start, end))
+
+
+def reserved_per_day(windows, start: date, days: int):
+    """Units reserved on each of `days` days from `start`, via a difference array and prefix sum.
+
+    A booking counts against every day its window touches. Units in possession stay out
+    at least until today, even when the booked end date has passed.
+    """
+    today = datetime.utcnow().date()
+    firsts, lasts, quantities = [], [], []
+    for b_start, b_end, quantity, status in windows:
+        last = b_end.date()
+        if status in POSSESSION_STATUSES:
+            last = max(last, today)
+        first = max((b_start.date() - start).days, 0)
+        last = min((last - start).days, days - 1)
+        if first <= last:
+            firsts.append(first)
+            lasts.append(last)
+            quantities.append(quantity)
+
+    if np is not None:
+        diff = np.zeros(days + 1, dtype=np.int64)
+        np.add.at(diff, np.array(firsts, dtype=np.intp), quantities)
+        np.add.at(diff, np.array(lasts, dtype=np.intp) + 1, np.negative(quantities))
+        return np.cumsum(diff[:days]).tolist()
+
+    diff = [0] * (days + 1)
+    for first, last, quantity in zip(firsts, lasts, quantities):
+        diff[first] += quantity
+        diff[last + 1] -= quantity
+    return list(accumulate(diff[:days]))
+
+
+def calendars(db: Session, assets, start: date, days: int) -> dict:
+    """asset_id -> free units per day for `days` days from `start`, for many assets in one query."""
+    window_start = datetime.combine(start, datetime.min.time())
+    window_end = window_start + timedelta(days=days) - _RESOLUTION
+    windows = _active_windows_by_asset(
+        db, [asset.id for asset in assets],
+        or_(overlaps(window_start, window_end), models.Booking.status.in_(POSSESSION_STATUSES))
+    )
+    return {
+        asset.id: [max(0, asset.total_quantity - used) for used in reserved_per_day(windows[asset.id], start, days)]
+        for asset in assets
+    }
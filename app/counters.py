@@ -0,0 +1,140 @@
+import os
+import random
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import models
+
+# Running totals behind the admin dashboards, kept in models.DashboardCounters.
+#
+# The totals are split over SHARDS rows (ids 1..SHARDS) and summed on read. Writers call
+# bump()/booking_added()/booking_status_changed() before they commit, so each counter moves
+# in the same transaction as the rows it counts: a rollback undoes both, and the
+# UPDATE ... SET x = x + n is atomic against concurrent writers. Each session always updates
+# the same shard, picked at random, so two writers only queue on a counters row when they
+# drew the same one; with a single row, databases with row locks would serialize every
+# booking write behind it. create() inserts the rows up front (at startup); rebuild()
+# recounts the tables from scratch (see reconcile_counters.py).
+
+SHARDS = int(os.getenv("DASHBOARD_COUNTER_SHARDS", "16"))
+
+_SHARD = "counters_shard"  # Session.info key: this session's shard
+
+_table = models.DashboardCounters.__table__
+_columns = [column for column in _table.c if column.name not in ("id", "updated_at")]
+
+
+def status_column(status: str):
+    """Counter column for a booking status, or None for statuses without one."""
+    name = f"bookings_{status}"
+    return name if name in _table.c else None
+
+
+def count(db: Session) -> dict:
+    """Every counter, computed from the tables."""
+    values = {column.name: 0 for column in _table.c if column.name.startswith("bookings")}
+    values["users"] = db.query(func.count(models.User.id)).scalar()
+    values["assets"] = db.query(func.count(models.Asset.id)).scalar()
+    values["active_assets"] = db.query(func.count(models.Asset.id)).filter(models.Asset.active == True).scalar()
+    for status, total in db.query(models.Booking.status, func.count(models.Booking.id)).group_by(models.Booking.status):
+        values["bookings"] += total
+        column = status_column(status)
+        if column:
+            values[column] = total
+    return values
+
+
+def _missing_rows(db: Session):
+    """(rows, counted): rows for the shards that don't exist yet. When there are none at all,
+    the first one carries the current counts (counted is True)."""
+    existing = set(db.scalars(select(_table.c.id)))
+    rows = [{"id": shard, **{column.name: 0 for column in _columns}}
+            for shard in range(1, SHARDS + 1) if shard not in existing]
+    counted = bool(rows) and not existing
+    if counted:
+        rows[0].update(count(db))
+    return rows, counted
+
+
+def create(db: Session):
+    """Insert the shard rows that don't exist yet, and commit. Safe to run concurrently."""
+    rows, _counted = _missing_rows(db)
+    if not rows:
+        return
+    try:
+        db.execute(insert(_table), rows)
+        db.commit()
+    except IntegrityError:
+        # Another process created them first
+        db.rollback()
+
+
+def rebuild(db: Session) -> dict:
+    """Overwrite the counters with fresh counts, in the caller's transaction."""
+    values = count(db)
+    rows, _counted = _missing_rows(db)
+    if rows:
+        db.execute(insert(_table), rows)
+    db.execute(update(_table).values({column.name: 0 for column in _columns}))
+    db.execute(update(_table).where(_table.c.id == 1).values(values))
+    db.flush()
+    return values
+
+
+def bump(db: Session, **deltas):
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    # Flush first so a first count below sees this transaction's pending rows
+    db.flush()
+    shard = db.info.setdefault(_SHARD, random.randint(1, SHARDS))
+    statement = (
+        update(_table)
+        .where(_table.c.id == shard)
+        .values({name: _table.c[name] + delta for name, delta in deltas.items()})
+    )
+    if db.execute(statement).rowcount:
+        return
+    # The rows weren't created (create() runs at startup): add them, counting the tables
+    # if there were none, which already includes this write
+    rows, counted = _missing_rows(db)
+    try:
+        with db.begin_nested():
+            db.execute(insert(_table), rows)
+    except IntegrityError:
+        # Another writer created them first
+        counted = False
+    if not counted:
+        db.execute(statement)
+
+
+def booking_added(db: Session, status: str):
+    deltas = {"bookings": 1}
+    column = status_column(status)
+    if column:
+        deltas[column] = 1
+    bump(db, **deltas)
+
+
+def booking_status_changed(db: Session, old_status: str, new_status: str, count: int = 1):
+    deltas = {}
+    for status, delta in ((old_status, -count), (new_status, count)):
+        column = status_column(status)
+        if column:
+            deltas[column] = deltas.get(column, 0) + delta
+    bump(db, **deltas)
+
+
+def read(db: Session):
+    """The totals, summed over the shards (creating them first if needed). A row with one
+    attribute per counter, plus updated_at: the last time any counter moved."""
+    statement = select(
+        func.count(_table.c.id).label("shards"),
+        *[func.coalesce(func.sum(column), 0).label(column.name) for column in _columns],
+        func.max(_table.c.updated_at).label("updated_at"),
+    )
+    totals = db.execute(statement).one()
+    if not totals.shards:
+        create(db)
+        totals = db.execute(statement).one()
+    return totals
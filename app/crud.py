@@ -1,7 +1,13 @@
-from sqlalchemy.orm import Session, joinedload
-from . import models, schemas
-from .auth import get_password_hash
-from typing import Any
+from sqlalchemy import func, insert, tuple_
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
+from . import models, schemas, audit, availability, counters
+from . import search as search_module
+from .auth import get_password_hash, invalidate_principal
+from typing import Any, List
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
 
 def get_user(db: Session, user_id: int):
     return db.query(models.User).filter(models.User.id == user_id).first()
@@ -9,11 +15,21 @@ def get_user(db: Session, user_id: int):
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.User).offset(skip).limit(limit).all()
-
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+def get_user_version(db: Session, user_id: int):
+    # Primary key lookup of one column; None when the user no longer exists
+    row = db.query(models.User.updated_at).filter(models.User.id == user_id).first()
+    return None if row is None else (row.updated_at,)
+
+def get_users(db: Session, after_id: int = None, limit: int = 100):
+    # Keyset page in id order: seeks past the previous page's last id instead of an OFFSET scan
+    query = db.query(models.User)
+    if after_id is not None:
+        query = query.filter(models.User.id > after_id)
+    return query.order_by(models.User.id).limit(limit).all()
+
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str = None):
+    # Async callers hash on the worker pool first and pass the hash in
+    hashed_password = hashed_password or get_password_hash(user.password)
     db_user = models.User(
         email=user.email,
         password=hashed_password,
@@ -28,15 +44,26 @@ def create_user(db: Session, user: schemas.UserCreate):
         needs=user.needs
     )
     db.add(db_user)
+    counters.bump(db, users=1)
     db.commit()
     db.refresh(db_user)
     return db_user
 
+def record_login(db: Session, user_id: int):
+    # Atomic increment: concurrent logins for the same user must not overwrite each other
+    db.query(models.User).filter(models.User.id == user_id).update(
+        {models.User.login_count: models.User.login_count + 1}, synchronize_session=False
+    )
+    db.commit()
+    invalidate_principal(user_id)
+    return get_user(db, user_id)
+
 def update_user_status(db: Session, user_id: int, status: str):
     db_user = get_user(db, user_id)
     if db_user:
         db_user.status = status
         db.commit()
+        invalidate_principal(user_id)
         db.refresh(db_user)
     return db_user
 
@@ -47,6 +74,7 @@ def update_user_profile(db: Session, user_id: int, profile_data: schemas.UserPro
         for key, value in update_data.items():
             setattr(db_user, key, value)
         db.commit()
+        invalidate_principal(user_id)
         db.refresh(db_user)
     return db_user
 
@@ -54,105 +82,142 @@ def delete_user(db: Session, user_id: int):
     db_user = get_user(db, user_id)
     if db_user:
         db.delete(db_user)
+        counters.bump(db, users=-1)
         db.commit()
+        invalidate_principal(user_id)
 
 # Assets
 def calculate_availability(db: Session, asset: models.Asset):
-    # Calculate active bookings that reduce availability
-    # Statuses that hold inventory: pending, awaiting_payment, paid, in_possession
-    # We could also check date overlaps, but for simple quantity display "Available Now", 
-    # we can just count un-returned, non-cancelled bookings.
-    # However, future bookings shouldn't reduce "Available Now" count unless they overlap today.
-    # For this fix, let's assume if it's booked (even future), it reduces "general availability" for simplicity, 
-    # OR better: check overlap with TODAY.
-    
-    from datetime import datetime
-    now = datetime.utcnow()
-    
-    active_count = 0
-    # This is inefficient for lists, but fine for small scale
-    # Better: do a join query or subquery. Given the "sqlite json dates" structure, python side filter is safer.
-    
-    bookings = db.query(models.Booking).filter(
-        models.Booking.asset_id == asset.id,
-        models.Booking.status.in_(["pending", "awaiting_payment", "paid", "in_possession"])
-    ).all()
-    
-    for b in bookings:
-        # Check overlaps with today?
-        # If user books for next week, should it show unavailable today?
-        # Usually no. But "Quantity: 5" often implies "Total Stock". 
-        # "Available: 4" implies 1 is out.
-        # If the user says "count doesn't update", they likely see "Inventory: 5" and want "Available: 4".
-        # Let's subtract ALL active bookings for now to be safe/responsive to "request made", 
-        # or implement proper date overlap with "now".
-        # Let's do overlap with "now" to be accurate.
-        
-        # Parse dates
-        if not b.dates: continue
-        b_dates = b.dates
-        if isinstance(b_dates, str):
-            import json
-            try:
-                b_dates = json.loads(b_dates)
-            except:
-                continue
-        
-        if not isinstance(b_dates, dict) or "start" not in b_dates:
-             continue
-             
-        try:
-            b_start = datetime.fromisoformat(str(b_dates["start"]).replace("Z", "+00:00")).replace(tzinfo=None)
-            b_end = datetime.fromisoformat(str(b_dates["end"]).replace("Z", "+00:00")).replace(tzinfo=None)
-            
-            # Simple overlap check: is NOW within booking window? 
-            # Or is booking status 'in_possession'? 
-            # If 'in_possession', definitely unavailable.
-            if b.status == 'in_possession':
-                active_count += b.quantity
-            elif now >= b_start and now <= b_end:
-                 active_count += b.quantity
-            # If status is pending/paid but dates are future?
-            # User might expect "Available for my selected dates". The UI has a date picker.
-            # But the UI *also* shows a static "Inventory: X". I should update that static text to "Available Now: Y".
-            # If I make a request for *today*, it should drop.
-            
-        except:
-             continue
-    
-    return max(0, asset.total_quantity - active_count)
+    # Units free right now, answered from the asset's cached interval index
+    return availability.free_now(db, asset)
 
 
-def get_assets(db: Session, skip: int = 0, limit: int = 100, location: str = None, type: str = None):
+def get_assets(db: Session, after: tuple = None, limit: int = 100, location: str = None, type: str = None,
+               search: str = None, available_from: datetime = None, available_to: datetime = None, quantity: int = 1):
+    # Keyset pages continuing after `after`: (id,) in id order, or (rank, id) in relevance
+    # order when searching (each asset then carries its search_rank)
     query = db.query(models.Asset)
     if location:
         query = query.filter(models.Asset.location.contains(location))
     if type:
         query = query.filter(models.Asset.type.contains(type))
-    assets = query.offset(skip).limit(limit).all()
+
+    if search:
+        query = search_module.ranked(db, query, search)
+    else:
+        query = query.order_by(models.Asset.id)
+
+    def fetch(after, size):
+        page = query
+        if after is not None:
+            page = page.filter(search_module.seek(db, after) if search else models.Asset.id > after[0])
+        rows = page.limit(size).all()
+        if not search:
+            return rows
+        for asset, rank in rows:
+            asset.search_rank = rank
+        return [asset for asset, _rank in rows]
+
+    if available_from and available_to:
+        # Walk the candidates a batch at a time and keep those with enough free units for
+        # the whole window; available_quantity then reports the free count for that window
+        matches = []
+        last = after
+        while len(matches) < limit:
+            batch = fetch(last, limit)
+            if not batch:
+                break
+            last = asset_page_key(batch[-1])
+            free = availability.free_between_many(db, batch, available_from, available_to)
+            for asset in batch:
+                if free[asset.id] >= quantity:
+                    asset.available_quantity = free[asset.id]
+                    matches.append(asset)
+        return matches[:limit]
+
+    assets = fetch(after, limit)
     
-    # Calculate available_quantity
+    # Calculate available_quantity for the whole page at once
+    free = availability.free_now_many(db, assets)
     for asset in assets:
-        asset.available_quantity = calculate_availability(db, asset)
+        asset.available_quantity = free[asset.id]
         
     return assets
 
+def asset_page_key(asset: models.Asset) -> tuple:
+    """Cursor key of an asset as returned by get_assets."""
+    rank = getattr(asset, "search_rank", None)
+    return (rank, asset.id) if rank is not None else (asset.id,)
+
 def get_asset(db: Session, asset_id: int):
     asset = db.query(models.Asset).filter(models.Asset.id == asset_id).first()
     if asset:
         asset.available_quantity = calculate_availability(db, asset)
     return asset
 
+def get_catalog_version(db: Session, assets, free_now: bool = True):
+    """(etag parts, last modified) for a catalog response built from `assets`.
+
+    The parts cover everything in the body, computed available_quantity included, so they
+    also move when a booking window starts or ends. Last modified has to move whenever the
+    response could, including when an edit takes an asset out of a filtered or searched
+    list, so it is catalog-wide: the newest updated_at of any asset (an index lookup), the
+    counters (touched by every booking write and asset create/delete) and, for free-now
+    counts, the last time one of `assets` moved on its own.
+    """
+    parts = [(asset.id, asset.updated_at, asset.booking_version, asset.available_quantity) for asset in assets]
+    times = [db.query(func.max(models.Asset.updated_at)).scalar(), counters.read(db).updated_at]
+    if free_now:
+        times.append(availability.changed_at_many(db, assets))
+    return parts, max((t for t in times if t), default=None)
+
+def get_assets_with_version(db: Session, **filters):
+    assets = get_assets(db, **filters)
+    windowed = filters.get("available_from") is not None
+    return assets, get_catalog_version(db, assets, free_now=not windowed)
+
+def get_asset_with_version(db: Session, asset_id: int):
+    asset = get_asset(db, asset_id)
+    if not asset:
+        return None, None
+    return asset, get_catalog_version(db, [asset])
+
+def get_asset_calendars(db: Session, asset_ids: List[int], days: int = 90):
+    assets = db.query(models.Asset).filter(models.Asset.id.in_(asset_ids)).all()
+    start = datetime.utcnow().date()
+    free = availability.calendars(db, assets, start, days)
+    return [
+        {"asset_id": asset.id, "total_quantity": asset.total_quantity, "start": start, "free": free[asset.id]}
+        for asset in assets
+    ]
+
 def create_asset(db: Session, asset: schemas.AssetCreate):
-    db_asset = models.Asset(**asset.model_dump())
+    # available_quantity is computed from bookings, not stored
+    db_asset = models.Asset(**asset.model_dump(exclude={"available_quantity"}))
     db.add(db_asset)
+    counters.bump(db, assets=1, active_assets=int(bool(db_asset.active)))
+    search_module.index_asset(db, db_asset)
     db.commit()
     db.refresh(db_asset)
     return db_asset
 
+def create_assets(db: Session, assets: List[schemas.AssetCreate]) -> List[int]:
+    """Insert a batch of assets in one executemany, with their counters and search entries,
+    inside the caller's transaction (see asset_import.py). Returns the new ids."""
+    if not assets:
+        return []
+    rows = [asset.model_dump(exclude={"available_quantity"}) for asset in assets]
+    created = db.scalars(insert(models.Asset).returning(models.Asset), rows).all()
+    counters.bump(db, assets=len(created), active_assets=sum(1 for asset in created if asset.active))
+    search_module.index_assets(db, created)
+    for asset in created:
+        db.expunge(asset)
+    return [asset.id for asset in created]
+
 def update_asset(db: Session, asset_id: int, asset_data: schemas.AssetUpdate, user_id: int = None):
     db_asset = get_asset(db, asset_id)
     if db_asset:
+        was_active = bool(db_asset.active)
         update_data = asset_data.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_asset, key, value)
@@ -160,6 +225,8 @@ def update_asset(db: Session, asset_id: int, asset_data: schemas.AssetUpdate, us
         if user_id:
             db_asset.last_modified_by_id = user_id
             
+        counters.bump(db, active_assets=int(bool(db_asset.active)) - int(was_active))
+        search_module.index_asset(db, db_asset)
         db.commit()
         db.refresh(db_asset)
     return db_asset
@@ -168,7 +235,10 @@ def delete_asset(db: Session, asset_id: int):
     db_asset = get_asset(db, asset_id)
     if db_asset:
         db.delete(db_asset)
+        counters.bump(db, assets=-1, active_assets=-int(bool(db_asset.active)))
+        search_module.remove_asset(db, asset_id)
         db.commit()
+        availability.invalidate(asset_id)
 
 # Bookings
 import uuid
@@ -176,192 +246,153 @@ import uuid
 def generate_ref_code():
     return f"BK-{uuid.uuid4().hex[:6].upper()}"
 
-def get_bookings(db: Session, user_id: int = None, skip: int = 0, limit: int = 100):
+BOOKING_LIST_USER_COLUMNS = [getattr(models.User, f) for f in schemas.BookingUserSummary.model_fields]
+BOOKING_LIST_ASSET_COLUMNS = [getattr(models.Asset, f) for f in schemas.BookingAssetSummary.model_fields]
+
+def get_bookings(db: Session, user_id: int = None, before: tuple = None, limit: int = 100):
+    # Newest first, keyset-paged on (created_at, id): `before` is the last row of the
+    # previous page, and ix_bookings_created / ix_bookings_user_created serve the seek
     query = db.query(models.Booking)
     if user_id:
         query = query.filter(models.Booking.user_id == user_id)
-    import traceback
-    import json
+    if before is not None:
+        query = query.filter(tuple_(models.Booking.created_at, models.Booking.id) < tuple_(*before))
     try:
+        # One query: the list rows (schemas.BookingSummary) with the user and asset columns
+        # they show joined in. raiseload turns any other relationship access into an error
+        # instead of a query per row.
         bookings = query.options(
-        joinedload(models.Booking.user),
-        joinedload(models.Booking.asset)
-    ).order_by(models.Booking.created_at.desc()).offset(skip).limit(limit).all()
-        
-        # Fix for SQLite JSON string issue
-        for b in bookings:
-            if isinstance(b.dates, str):
-                try:
-                    b.dates = json.loads(b.dates)
-                except:
-                    b.dates = {}
-            # Also fix audits
-            for a in b.audits:
-                if isinstance(a.details, str):
-                    try:
-                        a.details = json.loads(a.details)
-                    except:
-                        a.details = {}
+        joinedload(models.Booking.user).load_only(*BOOKING_LIST_USER_COLUMNS),
+        joinedload(models.Booking.asset).load_only(*BOOKING_LIST_ASSET_COLUMNS),
+        raiseload("*")
+    ).order_by(models.Booking.created_at.desc(), models.Booking.id.desc()).limit(limit).all()
         return bookings
-    except Exception as e:
-        with open("backend_error.log", "a") as f:
-            f.write(f"CRITICAL ERROR IN get_bookings: {str(e)}\n{traceback.format_exc()}\n")
-        raise e
+    except Exception:
+        logger.exception("get_bookings failed", extra={"user_id": user_id})
+        raise
 
 def get_booking(db: Session, booking_id: int):
-    # import json # already imported in get_bookings scope, but good to be safe or module level
-    import json
+    # Full detail: the one-to-many collections come in one extra query each
     b = db.query(models.Booking).options(
         joinedload(models.Booking.user),
-        joinedload(models.Booking.asset)
+        joinedload(models.Booking.asset),
+        joinedload(models.Booking.feedback),
+        selectinload(models.Booking.audits),
+        selectinload(models.Booking.payments)
     ).filter(models.Booking.id == booking_id).first()
-    if b:
-        # Fix dates JSON
-        if isinstance(b.dates, str):
-            try:
-                b.dates = json.loads(b.dates)
-            except:
-                b.dates = {}
-        # Fix audits JSON
-        for a in b.audits:
-            if isinstance(a.details, str):
-                try:
-                    a.details = json.loads(a.details)
-                except:
-                    a.details = {}
     return b
 
 from fastapi import HTTPException
 from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+import time
+
+# How many times, and for how many seconds in all, create_booking re-checks availability
+# after losing a race for the asset. Each attempt can itself wait out SQLite's busy_timeout.
+BOOKING_ADMISSION_RETRIES = 20
+BOOKING_ADMISSION_TIMEOUT = 10.0
+
+def is_lock_contention(error: OperationalError) -> bool:
+    # SQLITE_BUSY / SQLITE_LOCKED: another connection held the write lock past busy_timeout.
+    # Anything else (disk full, I/O or schema errors) is a real failure, not a lost race.
+    message = str(error.orig).lower()
+    return "database is locked" in message or "database table is locked" in message or "database is busy" in message
+
+def touch_asset_bookings(db: Session, *asset_ids: int):
+    # Mark the assets' bookings as changed, inside the caller's transaction
+    db.execute(
+        update(models.Asset)
+        .where(models.Asset.id.in_(asset_ids))
+        .values(booking_version=models.Asset.booking_version + 1, updated_at=models.Asset.updated_at)
+    )
 
 def create_booking(db: Session, booking: schemas.BookingCreate, user_id: int):
-    import traceback
-    with open("debug_flow.txt", "a") as f:
-        f.write(f"ENTER create_booking for user {user_id} asset {booking.asset_id}\n")
+    logger.debug("create_booking", extra={"user_id": user_id, "asset_id": booking.asset_id})
 
     try:
-        # Check Availability
-        with open("debug_flow.txt", "a") as f: f.write("Getting asset...\n")
-        asset = get_asset(db, booking.asset_id)
+        # Just the row: admission checks the window below, and the free-now count for the
+        # response is only worth computing once the booking is in
+        asset = db.get(models.Asset, booking.asset_id)
         if not asset:
             raise HTTPException(status_code=404, detail="Asset not found")
 
         # Parse requested dates
-        with open("debug_flow.txt", "a") as f: f.write(f"Parsing dates: {booking.dates}\n")
-        req_start = datetime.fromisoformat(str(booking.dates["start"]).replace("Z", "+00:00"))
-        req_end = datetime.fromisoformat(str(booking.dates["end"]).replace("Z", "+00:00"))
-        
-        # Get all active bookings for this asset
-        # In a production app, use DB-side filtering. Here we filter in Python for JSON simplicity.
-        with open("debug_flow.txt", "a") as f: f.write("Querying active bookings...\n")
-        active_statuses = ["pending", "awaiting_payment", "paid", "in_possession", "overdue"]
-        asset_bookings = db.query(models.Booking).filter(
-            models.Booking.asset_id == booking.asset_id,
-            models.Booking.status.in_(active_statuses)
-        ).all()
-        
-        current_reserved = 0
-        with open("debug_flow.txt", "a") as f: f.write(f"Found {len(asset_bookings)} existing bookings. Checking overlap...\n")
-        
-        for b in asset_bookings:
-            # Check overlap
-            # Overlap if: A_start <= B_end AND A_end >= B_start
-            if not b.dates: continue
-            
-            # Handle string dates (if JSON not decoded)
-            b_dates = b.dates
-            if isinstance(b_dates, str):
-                import json
-                try:
-                    b_dates = json.loads(b_dates)
-                except:
-                    continue
-
-            if not isinstance(b_dates, dict) or "start" not in b_dates:
-                    continue
-            
-            b_start = datetime.fromisoformat(str(b_dates["start"]).replace("Z", "+00:00"))
-            b_end = datetime.fromisoformat(str(b_dates["end"]).replace("Z", "+00:00"))
-            
-            if req_start <= b_end and req_end >= b_start:
-                current_reserved += b.quantity
-                
-        if current_reserved + booking.quantity > asset.total_quantity:
-            with open("debug_flow.txt", "a") as f: f.write("Insufficient units!\n")
-            raise HTTPException(status_code=400, detail=f"Insufficient units available. {asset.total_quantity - current_reserved} units remaining for these dates.")
-            
-        # Create Booking
-        with open("debug_flow.txt", "a") as f: f.write("Creating booking record...\n")
-        db_booking = models.Booking(
-            **booking.model_dump(),
-            user_id=user_id,
-            reference_code=generate_ref_code(),
-            status="pending"
-        )
-        db.add(db_booking)
-        db.commit()
-        db.refresh(db_booking)
-        
-        # Create Initial Audit Log
-        create_booking_audit(db, db_booking.id, "Created", "Booking created by user", user_id)
+        window = availability.parse_booking_dates(booking.dates)
+        if not window:
+            raise HTTPException(status_code=400, detail="Booking dates must include a valid start and end")
+        req_start, req_end = window
+        if req_end < req_start:
+            raise HTTPException(status_code=400, detail="Booking end must not be before its start")
         
-        # FIX: Ensure dates is a dict before returning to Pydantic
-        import json
-        if isinstance(db_booking.dates, str):
+        # Admit the booking: check the peak reserved units over the window, then claim the
+        # asset's booking_version with a compare-and-set in the same transaction as the insert.
+        # If another booking for this asset committed in between, the claim matches no row and
+        # we re-check against the new state, so capacity can't be oversold. Bookings for other
+        # assets touch other rows and don't contend.
+        admitted = False
+        deadline = time.monotonic() + BOOKING_ADMISSION_TIMEOUT
+        for attempt in range(BOOKING_ADMISSION_RETRIES):
+            version = db.query(models.Asset.booking_version).filter(models.Asset.id == asset.id).scalar()
+            units_free = availability.free_between(db, asset, req_start, req_end)
+                    
+            if booking.quantity > units_free:
+                logger.debug("Insufficient units", extra={"asset_id": asset.id, "requested": booking.quantity, "free": units_free})
+                raise HTTPException(status_code=400, detail=f"Insufficient units available. {units_free} units remaining for these dates.")
+
             try:
-                db_booking.dates = json.loads(db_booking.dates)
-            except:
-                pass
-
-        # FIX: Ensure audit details are dicts
-        for a in db_booking.audits:
-            if isinstance(a.details, str):
-                try:
-                    a.details = json.loads(a.details)
-                except:
-                    pass
-        
-        # FIX: Ensure Asset JSON fields are parsed (if loaded/returned)
-        if db_booking.asset:
-            for field in ['specs', 'images', 'duration_options', 'availability']:
-                val = getattr(db_booking.asset, field, None)
-                if isinstance(val, str):
-                    try:
-                        setattr(db_booking.asset, field, json.loads(val))
-                    except:
-                        pass
-
-        # FIX: Ensure User JSON fields are parsed (if loaded/returned)
-        # Note: create_booking doesn't usually load user, but if Pydantic expects it...
-        if db_booking.user:
-            for field in ['certifications', 'needs']:
-                val = getattr(db_booking.user, field, None)
-                if isinstance(val, str):
-                    try:
-                        setattr(db_booking.user, field, json.loads(val))
-                    except:
-                        pass
+                claimed = db.execute(
+                    update(models.Asset)
+                    .where(models.Asset.id == asset.id, models.Asset.booking_version == version)
+                    .values(booking_version=version + 1, updated_at=models.Asset.updated_at)
+                ).rowcount
+                if claimed:
+                    # Create Booking
+                    db_booking = models.Booking(
+                        **booking.model_dump(),
+                        start_at=req_start,
+                        end_at=req_end,
+                        user_id=user_id,
+                        reference_code=generate_ref_code(),
+                        status="pending"
+                    )
+                    db.add(db_booking)
+                    counters.booking_added(db, db_booking.status)
+                    db.flush()
+                    create_booking_audit(db, db_booking.id, "Created", {"message": "Booking created by user"}, user_id)
+                    db.commit()
+                    admitted = True
+                    break
+            except OperationalError as error:
+                if not is_lock_contention(error):
+                    db.rollback()
+                    raise
+            logger.debug("Booking admission retry", extra={"asset_id": asset.id, "attempt": attempt})
+            db.rollback()
+            if time.monotonic() >= deadline:
+                break
+        if not admitted:
+            logger.warning("Booking admission gave up", extra={"asset_id": asset.id, "attempts": attempt + 1})
+            raise HTTPException(status_code=409, detail="This asset is being booked by others right now, please try again.")
+        db.refresh(db_booking)
+        # The response's asset: its cached index is stale after this booking, so don't rebuild it
+        asset.available_quantity = availability.free_now_direct(db, asset)
         
         # Debugging Validation
-        try:
-            schemas.Booking.model_validate(db_booking, from_attributes=True)
-        except Exception as val_err:
-            with open("debug_flow.txt", "a") as f: f.write(f"VALIDATION FAILURE: {val_err}\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            try:
+                schemas.Booking.model_validate(db_booking, from_attributes=True)
+            except Exception as val_err:
+                logger.debug("Booking response validation failed", extra={"booking_id": db_booking.id, "error": str(val_err)})
 
-        with open("debug_flow.txt", "a") as f: f.write("SUCCESS.\n")
+        logger.debug("Booking created", extra={"booking_id": db_booking.id, "reference_code": db_booking.reference_code})
         return db_booking
 
     except HTTPException as he:
         raise he
-    except Exception as e:
-        with open("backend_error.log", "a") as f:
-            f.write(f"CRITICAL ERROR IN create_booking: {str(e)}\n{traceback.format_exc()}\n")
-        raise e
-
-    # Create Initial Audit Log
-    create_booking_audit(db, db_booking.id, "Created", "Booking created by user", user_id)
-    
-    return db_booking
+    except Exception:
+        logger.exception("create_booking failed", extra={"user_id": user_id, "asset_id": booking.asset_id})
+        raise
 
 def update_booking_status(db: Session, booking_id: int, status: str, performed_by_id: int):
     db_booking = get_booking(db, booking_id)
@@ -373,9 +404,8 @@ def update_booking_status(db: Session, booking_id: int, status: str, performed_b
         if status == "paid":
              db_booking.payment_status = "paid"
         
-        db.commit()
-        db.refresh(db_booking)
-        
+        touch_asset_bookings(db, db_booking.asset_id)
+        counters.booking_status_changed(db, old_status, status)
         # Audit Log
         create_booking_audit(
             db, 
@@ -384,19 +414,80 @@ def update_booking_status(db: Session, booking_id: int, status: str, performed_b
             {"from": old_status, "to": status}, 
             performed_by_id
         )
+        db.commit()
+        db.refresh(db_booking)
         
     return db_booking
 
-def create_booking_audit(db: Session, booking_id: int, action: str, details: Any, performed_by_id: int = None):
-    db_audit = models.BookingAudit(
-        booking_id=booking_id,
-        action=action,
-        details=details,
-        performed_by_id=performed_by_id
-    )
-    db.add(db_audit)
+def update_booking_statuses(db: Session, booking_ids: List[int], status: str, performed_by_id: int):
+    """update_booking_status for many bookings in one transaction: one UPDATE per current
+    status, one counters bump per transition, one executemany of audits, one commit.
+    Returns a result per distinct id, in request order."""
+    booking_ids = list(dict.fromkeys(booking_ids))
+    current = dict(db.query(models.Booking.id, models.Booking.status).filter(models.Booking.id.in_(booking_ids)))
+    by_status = {}
+    for booking_id, old_status in current.items():
+        if old_status != status:
+            by_status.setdefault(old_status, []).append(booking_id)
+
+    values = {"status": status, "updated_at": datetime.utcnow()}
+    # Payment Logic Hook (Simple), as in update_booking_status
+    if status == "paid":
+        values["payment_status"] = "paid"
+    updated, asset_ids, audits = set(), set(), []
+    for old_status, ids in by_status.items():
+        # Conditional on the status read above, so the counters move by what really changed
+        rows = db.execute(
+            update(models.Booking)
+            .where(models.Booking.id.in_(ids), models.Booking.status == old_status)
+            .values(values)
+            .returning(models.Booking.id, models.Booking.asset_id)
+        ).all()
+        counters.booking_status_changed(db, old_status, status, count=len(rows))
+        for booking_id, asset_id in rows:
+            updated.add(booking_id)
+            asset_ids.add(asset_id)
+            audits.append(audit.entry(booking_id, "Status Updated", {"from": old_status, "to": status}, performed_by_id))
+    if asset_ids:
+        touch_asset_bookings(db, *asset_ids)
+    audit.record_many(db, audits)
     db.commit()
 
+    results = []
+    for booking_id in booking_ids:
+        old_status = current.get(booking_id)
+        if old_status is None:
+            outcome = "not_found"
+        elif old_status == status:
+            outcome = "unchanged"
+        else:
+            outcome = "updated" if booking_id in updated else "conflict"
+        results.append({"booking_id": booking_id, "outcome": outcome, "previous_status": old_status})
+    return results
+
+def create_booking_audit(db: Session, booking_id: int, action: str, details: Any, performed_by_id: int = None):
+    # Written with the caller's commit (or queued by it, in write-behind mode; see audit.py)
+    audit.record(db, booking_id, action, details, performed_by_id)
+
+def get_booking_audits(db: Session, booking_id: int = None, performed_by_id: int = None, action: str = None,
+                       since: datetime = None, until: datetime = None, before: tuple = None, limit: int = 100):
+    # Newest first, keyset-paged on (timestamp, id) like get_bookings; each filter has an
+    # index leading with it and ending in (timestamp, id), so the page is an ordered range scan
+    query = db.query(models.BookingAudit)
+    if booking_id is not None:
+        query = query.filter(models.BookingAudit.booking_id == booking_id)
+    if performed_by_id is not None:
+        query = query.filter(models.BookingAudit.performed_by_id == performed_by_id)
+    if action:
+        query = query.filter(models.BookingAudit.action == action)
+    if since is not None:
+        query = query.filter(models.BookingAudit.timestamp >= since)
+    if until is not None:
+        query = query.filter(models.BookingAudit.timestamp < until)
+    if before is not None:
+        query = query.filter(tuple_(models.BookingAudit.timestamp, models.BookingAudit.id) < tuple_(*before))
+    return query.order_by(models.BookingAudit.timestamp.desc(), models.BookingAudit.id.desc()).limit(limit).all()
+
 def cancel_booking(db: Session, booking_id: int, user_id: int):
     # Retrieve booking
     db_booking = get_booking(db, booking_id)
@@ -419,9 +510,8 @@ def cancel_booking(db: Session, booking_id: int, user_id: int):
     if old_status == "paid":
         db_booking.payment_status = "refunded" # Or 'pending_refund'
         
-    db.commit()
-    db.refresh(db_booking)
-    
+    touch_asset_bookings(db, db_booking.asset_id)
+    counters.booking_status_changed(db, old_status, "cancelled")
     # Audit
     create_booking_audit(
         db, 
@@ -430,6 +520,8 @@ def cancel_booking(db: Session, booking_id: int, user_id: int):
         {"reason": "User requested cancellation", "from": old_status}, 
         user_id
     )
+    db.commit()
+    db.refresh(db_booking)
     
     return db_booking
 
@@ -461,57 +553,63 @@ def create_payment(db: Session, booking_id: int, payment: schemas.PaymentCreate,
     db.add(db_payment)
     
     # Update Booking
+    old_status = booking.status
     booking.status = "paid"
     booking.payment_status = "paid"
     booking.total_amount = payment.amount
     
+    touch_asset_bookings(db, booking.asset_id)
+    counters.booking_status_changed(db, old_status, "paid")
+    create_booking_audit(db, booking_id, "Payment Received", {"amount": payment.amount, "ref": db_payment.reference}, user_id)
     db.commit()
     db.refresh(db_payment)
     db.refresh(booking)
     
-    create_booking_audit(db, booking_id, "Payment Received", {"amount": payment.amount, "ref": db_payment.reference}, user_id)
-    
     return db_payment
 
 def get_stats(db: Session):
-    users_count = db.query(models.User).count()
-    active_assets = db.query(models.Asset).filter(models.Asset.active == True).count()
-    pending_bookings = db.query(models.Booking).filter(models.Booking.status == "pending").count()
+    # Maintained counters: one row read instead of a COUNT per figure
+    totals = counters.read(db)
     return {
-        "users": users_count,
-        "activeAssets": active_assets,
-        "pendingBookings": pending_bookings
+        "users": totals.users,
+        "activeAssets": totals.active_assets,
+        "pendingBookings": totals.bookings_pending
     }
 
 def get_admin_dashboard_stats(db: Session):
-    users_count = db.query(models.User).count()
-    active_assets = db.query(models.Asset).filter(models.Asset.active == True).count()
-    
-    # "Pending Requests" -> Pending
-    pending = db.query(models.Booking).filter(models.Booking.status == "pending").count()
-    
-    # "Assets with Users" -> In Possession
-    in_possession = db.query(models.Booking).filter(models.Booking.status == "in_possession").count()
-    
-    # "Completion Rate" derived from Completed (Returned) vs Total
-    completed = db.query(models.Booking).filter(models.Booking.status == "returned").count()
-    
-    total = db.query(models.Booking).count()
-    
+    totals = counters.read(db)
     return {
-        "total_users": users_count,
-        "active_assets": active_assets,
-        "pending_requests": pending,
-        "assets_in_possession": in_possession,
-        "completed_requests": completed,
-        "total_requests": total
+        "total_users": totals.users,
+        "active_assets": totals.active_assets,
+        # "Pending Requests" -> Pending
+        "pending_requests": totals.bookings_pending,
+        # "Assets with Users" -> In Possession
+        "assets_in_possession": totals.bookings_in_possession,
+        # "Completion Rate" derived from Completed (Returned) vs Total
+        "completed_requests": totals.bookings_returned,
+        "total_requests": totals.bookings
     }
 
+def get_user_dashboard_version(db: Session, user_id: int):
+    # Changes whenever one of the user's bookings is added or updated; an index-only
+    # lookup on (user_id, updated_at)
+    latest, count = db.query(func.max(models.Booking.updated_at), func.count(models.Booking.id)).filter(
+        models.Booking.user_id == user_id
+    ).one()
+    return latest, count
+
 def get_user_dashboard_stats(db: Session, user_id: int):
-    total = db.query(models.Booking).filter(models.Booking.user_id == user_id).count()
-    pending = db.query(models.Booking).filter(models.Booking.user_id == user_id, models.Booking.status == "pending").count()
-    active = db.query(models.Booking).filter(models.Booking.user_id == user_id, models.Booking.status.in_(["in_possession", "paid"])).count()
-    completed = db.query(models.Booking).filter(models.Booking.user_id == user_id, models.Booking.status == "returned").count()
+    # One grouped aggregate instead of a COUNT per figure
+    by_status = dict(
+        db.query(models.Booking.status, func.count(models.Booking.id))
+        .filter(models.Booking.user_id == user_id)
+        .group_by(models.Booking.status)
+        .all()
+    )
+    total = sum(by_status.values())
+    pending = by_status.get("pending", 0)
+    active = by_status.get("in_possession", 0) + by_status.get("paid", 0)
+    completed = by_status.get("returned", 0)
     
     return {
         "total_bookings": total,
@@ -0,0 +1,143 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import List
+from . import asset_import, crud, schemas, serialization
+from .database import SessionLocal
+
+# Async versions of the crud functions used by the routers.
+#
+# Each one runs the sync implementation in crud.py through AsyncSession.run_sync, so queries
+# go through the async driver and never block the event loop, while the business logic stays
+# in one place. Results are converted to their response schema inside run_sync: relationships
+# can only lazy-load there, not later when FastAPI serializes the response. Lists are
+# validated in one call through the schema's prebuilt TypeAdapter (see serialization.py).
+# import_assets is the exception: it is CPU-bound, so it runs on the worker pool instead.
+
+
+async def _run(db: AsyncSession, fn, *args, schema=None, **kwargs):
+    def call(session):
+        result = fn(session, *args, **kwargs)
+        if schema is None or result is None:
+            return result
+        return serialization.validate(schema, result)
+    return await db.run_sync(call)
+
+
+# Users
+async def get_user(db: AsyncSession, user_id: int):
+    return await _run(db, crud.get_user, user_id, schema=schemas.User)
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    # ORM instance: auth and login read its columns and update login_count
+    return await _run(db, crud.get_user_by_email, email)
+
+async def get_user_version(db: AsyncSession, user_id: int):
+    return await _run(db, crud.get_user_version, user_id)
+
+async def get_users(db: AsyncSession, after_id: int = None, limit: int = 100):
+    return await _run(db, crud.get_users, after_id, limit, schema=schemas.User)
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate, hashed_password: str = None):
+    return await _run(db, crud.create_user, user, hashed_password, schema=schemas.User)
+
+async def record_login(db: AsyncSession, user_id: int):
+    return await _run(db, crud.record_login, user_id, schema=schemas.User)
+
+async def update_user_status(db: AsyncSession, user_id: int, status: str):
+    return await _run(db, crud.update_user_status, user_id, status, schema=schemas.User)
+
+async def update_user_profile(db: AsyncSession, user_id: int, profile_data: schemas.UserProfileUpdate):
+    return await _run(db, crud.update_user_profile, user_id, profile_data, schema=schemas.User)
+
+async def delete_user(db: AsyncSession, user_id: int):
+    return await _run(db, crud.delete_user, user_id)
+
+# Assets
+async def get_assets(db: AsyncSession, **filters):
+    return await _run(db, crud.get_assets, schema=schemas.Asset, **filters)
+
+async def get_asset(db: AsyncSession, asset_id: int):
+    return await _run(db, crud.get_asset, asset_id, schema=schemas.Asset)
+
+async def get_assets_if_modified(db: AsyncSession, is_fresh, **filters):
+    """(version, assets, last key) for the asset list; assets is None when is_fresh(version)
+    says the client's copy is current, so a 304 skips building the response models.
+    The last key is the cursor key of the last asset (see crud.asset_page_key)."""
+    def call(session):
+        assets, version = crud.get_assets_with_version(session, **filters)
+        last_key = crud.asset_page_key(assets[-1]) if assets else None
+        if is_fresh(version):
+            return version, None, last_key
+        return version, serialization.validate(schemas.Asset, assets), last_key
+    return await db.run_sync(call)
+
+async def get_asset_if_modified(db: AsyncSession, asset_id: int, is_fresh):
+    """(version, asset) like get_assets_if_modified; version is None for a missing asset."""
+    def call(session):
+        asset, version = crud.get_asset_with_version(session, asset_id)
+        if asset is None or is_fresh(version):
+            return version, None
+        return version, serialization.validate(schemas.Asset, asset)
+    return await db.run_sync(call)
+
+async def get_asset_calendars(db: AsyncSession, asset_ids: List[int], days: int = 90):
+    return await _run(db, crud.get_asset_calendars, asset_ids, days)
+
+async def create_asset(db: AsyncSession, asset: schemas.AssetCreate):
+    return await _run(db, crud.create_asset, asset, schema=schemas.Asset)
+
+async def import_assets(file, fmt: str, atomic: bool = False):
+    # Parsing and validating every record is CPU work that run_sync would do on the event
+    # loop, so the whole import runs on a sync session on the worker pool instead. `file` is
+    # the upload's spooled file, read record by record there.
+    def call():
+        with SessionLocal() as session:
+            return asset_import.import_assets(session, asset_import.read(file, fmt), atomic)
+    return await run_in_threadpool(call)
+
+async def update_asset(db: AsyncSession, asset_id: int, asset_data: schemas.AssetUpdate, user_id: int = None):
+    return await _run(db, crud.update_asset, asset_id, asset_data, user_id=user_id, schema=schemas.Asset)
+
+async def delete_asset(db: AsyncSession, asset_id: int):
+    return await _run(db, crud.delete_asset, asset_id)
+
+# Bookings
+async def get_bookings(db: AsyncSession, user_id: int = None, before: tuple = None, limit: int = 100):
+    return await _run(db, crud.get_bookings, user_id=user_id, before=before, limit=limit, schema=schemas.BookingSummary)
+
+async def get_booking(db: AsyncSession, booking_id: int):
+    return await _run(db, crud.get_booking, booking_id, schema=schemas.Booking)
+
+async def create_booking(db: AsyncSession, booking: schemas.BookingCreate, user_id: int):
+    return await _run(db, crud.create_booking, booking, user_id, schema=schemas.Booking)
+
+async def update_booking_status(db: AsyncSession, booking_id: int, status: str, performed_by_id: int):
+    return await _run(db, crud.update_booking_status, booking_id, status, performed_by_id, schema=schemas.Booking)
+
+async def update_booking_statuses(db: AsyncSession, booking_ids: List[int], status: str, performed_by_id: int):
+    return await _run(db, crud.update_booking_statuses, booking_ids, status, performed_by_id)
+
+async def get_booking_audits(db: AsyncSession, **filters):
+    return await _run(db, crud.get_booking_audits, schema=schemas.BookingAuditRecord, **filters)
+
+async def cancel_booking(db: AsyncSession, booking_id: int, user_id: int):
+    return await _run(db, crud.cancel_booking, booking_id, user_id, schema=schemas.Booking)
+
+async def create_payment(db: AsyncSession, booking_id: int, payment: schemas.PaymentCreate, user_id: int):
+    return await _run(db, crud.create_payment, booking_id, payment, user_id, schema=schemas.Payment)
+
+async def create_feedback(db: AsyncSession, booking_id: int, feedback: schemas.FeedbackCreate, user_id: int):
+    return await _run(db, crud.create_feedback, booking_id, feedback, user_id, schema=schemas.Feedback)
+
+# Stats
+async def get_stats(db: AsyncSession):
+    return await _run(db, crud.get_stats)
+
+async def get_admin_dashboard_stats(db: AsyncSession):
+    return await _run(db, crud.get_admin_dashboard_stats)
+
+async def get_user_dashboard_version(db: AsyncSession, user_id: int):
+    return await _run(db, crud.get_user_dashboard_version, user_id)
+
+async def get_user_dashboard_stats(db: AsyncSession, user_id: int):
+    return await _run(db, crud.get_user_dashboard_stats, user_id)
@@ -0,0 +1,101 @@
+import csv
+import io
+from datetime import datetime
+from sqlalchemy import select
+from . import json_codec, models
+from .database import AsyncSessionLocal
+
+# Streaming exports of bookings, payments and booking audits (CSV or NDJSON) for admins.
+#
+# The query runs on its own session with yield_per, and each batch of rows is encoded and
+# handed to the response before the next one is fetched, so memory stays flat whether the
+# export has a thousand rows or a million. Rows come out in primary key order, which SQLite
+# reads straight off the table; ordering by a timestamp would sort the whole result first.
+# The export reads one snapshot: the read transaction stays open until the last row is sent.
+
+BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# name -> (columns, timestamp column for the date range, status column for the status filter)
+EXPORTS = {
+    "bookings": (
+        [models.Booking.id, models.Booking.reference_code, models.Booking.user_id, models.Booking.asset_id,
+         models.Booking.status, models.Booking.payment_status, models.Booking.quantity, models.Booking.total_amount,
+         models.Booking.start_at, models.Booking.end_at, models.Booking.purpose, models.Booking.notes,
+         models.Booking.created_at, models.Booking.updated_at],
+        models.Booking.created_at,
+        models.Booking.status,
+    ),
+    "payments": (
+        [models.Payment.id, models.Payment.booking_id, models.Payment.reference, models.Payment.amount,
+         models.Payment.currency, models.Payment.status, models.Payment.method, models.Payment.created_at],
+        models.Payment.created_at,
+        models.Payment.status,
+    ),
+    # Audits have no status of their own: the filter matches their booking's current status
+    "audits": (
+        [models.BookingAudit.id, models.BookingAudit.booking_id, models.BookingAudit.performed_by_id,
+         models.BookingAudit.action, models.BookingAudit.details, models.BookingAudit.timestamp],
+        models.BookingAudit.timestamp,
+        models.Booking.status,
+    ),
+}
+
+
+def query(name: str, start: datetime = None, end: datetime = None, status: str = None):
+    """SELECT for an export: rows stamped in [start, end) (naive UTC) with the given status."""
+    columns, timestamp, status_column = EXPORTS[name]
+    stmt = select(*columns).order_by(columns[0])
+    if status:
+        if status_column.table is not columns[0].table:
+            stmt = stmt.join(status_column.table)
+        stmt = stmt.where(status_column == status)
+    if start is not None:
+        stmt = stmt.where(timestamp >= start)
+    if end is not None:
+        stmt = stmt.where(timestamp < end)
+    return stmt
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json_codec.dumps(value)
+    return value
+
+
+def _csv(rows, header=None) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    if header:
+        writer.writerow(header)
+    writer.writerows([_text(value) for value in row] for row in rows)
+    return out.getvalue()
+
+
+def _ndjson(rows, keys) -> str:
+    return "".join(
+        json_codec.dumps({key: value.isoformat() if isinstance(value, datetime) else value for key, value in zip(keys, row)}) + "\n"
+        for row in rows
+    )
+
+
+async def stream(name: str, fmt: str, start: datetime = None, end: datetime = None, status: str = None):
+    """Encoded chunks of an export, one per batch of rows; CSV starts with a header line."""
+    keys = [column.key for column in EXPORTS[name][0]]
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query(name, start, end, status).execution_options(yield_per=BATCH_SIZE))
+        header = keys if fmt == "csv" else None
+        async for rows in result.partitions():
+            yield _csv(rows, header) if fmt == "csv" else _ndjson(rows, keys)
+            header = None
+        if header:
+            # No rows at all: still a well-formed CSV
+            yield _csv([], header)
@@ -0,0 +1,54 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+
+# Conditional GET helpers: build validators from whatever version data an endpoint has
+# cheaply at hand, and answer 304 before doing the expensive part of the request.
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from version parts (ids, counts, timestamps...)."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for this header)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def validators(etag: str, last_modified: datetime = None, cache_control: str = None) -> dict:
+    """Response headers for a representation. `last_modified` is naive UTC, as stored."""
+    headers = {"ETag": etag}
+    # HTTP dates have one-second resolution: a second change within the same second would
+    # keep the same Last-Modified, so only advertise it once that second is over
+    if last_modified is not None and datetime.utcnow() - last_modified >= timedelta(seconds=1):
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return headers
+
+
+def is_fresh(request: Request, headers: dict) -> bool:
+    """Whether the client's copy matches `headers` (from validators()), per RFC 9110 13.2.2:
+    If-None-Match decides when present, If-Modified-Since is only consulted without it."""
+    if "if-none-match" in request.headers:
+        return etag_matches(request, headers["ETag"])
+    since = request.headers.get("if-modified-since")
+    if not since or "Last-Modified" not in headers:
+        return False
+    try:
+        return parsedate_to_datetime(headers["Last-Modified"]) <= parsedate_to_datetime(since)
+    except (TypeError, ValueError):
+        return False
+
+
+def not_modified(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,69 @@
+import json
+from sqlalchemy.types import JSON, Text, TypeDecorator
+
+try:
+    import orjson
+except ImportError:  # e.g. a platform without an orjson wheel: stdlib json instead
+    orjson = None
+
+# JSON encoding for the app's JSON columns, with orjson (a dependency, see pyproject.toml).
+#
+# Some older rows hold JSON that was encoded twice (a JSON string whose content is the
+# real object), which used to come back as `str` and was patched up with json.loads in
+# the crud functions. JSONCodec decodes those too, so reads always yield Python
+# structures; fix_double_encoded_json.py rewrites such rows once.
+
+
+if orjson is not None:
+    def dumps(value) -> str:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    loads = orjson.loads
+    DecodeError = orjson.JSONDecodeError
+else:
+    def dumps(value) -> str:
+        return json.dumps(value)
+
+    loads = json.loads
+    DecodeError = ValueError
+
+
+def decode(text):
+    """Python value for stored JSON text, unwrapping double-encoded objects and arrays."""
+    if text is None:
+        return None
+    value = loads(text)
+    while isinstance(value, str) and value.lstrip()[:1] in ("{", "["):
+        try:
+            value = loads(value)
+        except DecodeError:
+            break
+    return value
+
+
+class JSONCodec(TypeDecorator):
+    """JSON column that decodes exactly once per row, into dicts/lists, with the fast codec.
+
+    Stored as TEXT on SQLite (the same bytes the plain JSON type wrote); other databases
+    keep their native JSON type. None is stored as SQL NULL.
+    """
+
+    impl = JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(Text())
+        return dialect.type_descriptor(JSON())
+
+    def process_bind_param(self, value, dialect):
+        if dialect.name != "sqlite" or value is None:
+            return value
+        return dumps(value)
+
+    def process_result_value(self, value, dialect):
+        if dialect.name != "sqlite":
+            if isinstance(value, str) and value.lstrip()[:1] in ("{", "["):
+                return decode(value)
+            return value
+        return decode(value)
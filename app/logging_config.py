@@ -0,0 +1,82 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+
+# Logging for the app: records go through a QueueHandler so request threads never block
+# on I/O, and a QueueListener thread writes them out as JSON lines.
+#
+#   LOG_LEVEL   default level for the "app" loggers (WARNING)
+#   LOG_LEVELS  per-module overrides, e.g. "app.crud=DEBUG,app.availability=INFO"
+#   LOG_FILE    also write to this file (stderr only when unset)
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is emitted as a field
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_levels(spec: str) -> dict:
+    levels = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(level: str = None, levels: str = None, log_file: str = None):
+    """(Re)configure the "app" logger tree. Safe to call more than once."""
+    global _listener
+    level = (level or os.getenv("LOG_LEVEL", "WARNING")).upper()
+    levels = parse_levels(levels if levels is not None else os.getenv("LOG_LEVELS", ""))
+    log_file = log_file if log_file is not None else os.getenv("LOG_FILE")
+
+    if _listener is not None:
+        _listener.stop()
+
+    formatter = JSONFormatter()
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger("app")
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+    root.propagate = False
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+
+@atexit.register
+def _flush():
+    if _listener is not None:
+        _listener.stop()
@@ -1,6 +1,7 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, Text, JSON, DateTime
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, Text, DateTime, Index
 from sqlalchemy.orm import relationship
 from .database import Base
+from .json_codec import JSONCodec
 from datetime import datetime
 
 class User(Base):
@@ -22,10 +23,12 @@ class User(Base):
     phone = Column(String, nullable=True)
     location = Column(String, nullable=True)
     production_focus = Column(String, nullable=True)
-    certifications = Column(JSON, nullable=True) # List of strings
-    needs = Column(JSON, nullable=True) # List of strings
+    certifications = Column(JSONCodec, nullable=True) # List of strings
+    needs = Column(JSONCodec, nullable=True) # List of strings
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Moves on every write to the user: cached principals are checked against it (auth.py)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     bookings = relationship("Booking", back_populates="user")
     feedbacks = relationship("Feedback", back_populates="user")
@@ -39,17 +42,20 @@ class Asset(Base):
     type = Column(String, nullable=False)
     location = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    specs = Column(JSON, nullable=True)
-    images = Column(JSON, nullable=True) # List of URLs
+    specs = Column(JSONCodec, nullable=True)
+    images = Column(JSONCodec, nullable=True) # List of URLs
     cost = Column(String, nullable=False) # Storing as string to match schema decimal/string behavior easily
-    duration_options = Column(JSON, nullable=True)
-    availability = Column(JSON, nullable=True)
+    duration_options = Column(JSONCodec, nullable=True)
+    availability = Column(JSONCodec, nullable=True)
     total_quantity = Column(Integer, default=1, nullable=False)
+    # Bumped in the same transaction as every booking write for this asset; admission
+    # compares-and-sets it so concurrent bookings can't both take the last unit
+    booking_version = Column(Integer, default=0, nullable=False)
     active = Column(Boolean, default=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     
-    # Audit fields
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Audit fields. Indexed: the newest updated_at dates the whole catalog (crud.get_catalog_version)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     last_modified_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     owner = relationship("User", foreign_keys=[owner_id]) # explicit relationship if needed
@@ -67,7 +73,10 @@ class Booking(Base):
     asset_id = Column(Integer, ForeignKey("assets.id"), nullable=False)
     
     # Booking Details
-    dates = Column(JSON, nullable=False)
+    dates = Column(JSONCodec, nullable=False) # {"start": iso, "end": iso} as sent by the client
+    # Normalized copy of `dates` (naive UTC) so overlap checks can run in SQL
+    start_at = Column(DateTime, nullable=True)
+    end_at = Column(DateTime, nullable=True)
     quantity = Column(Integer, default=1, nullable=False)
     purpose = Column(Text, nullable=False)
     notes = Column(Text, nullable=True)
@@ -91,6 +100,15 @@ class Booking(Base):
     payments = relationship("Payment", back_populates="booking")
     feedback = relationship("Feedback", back_populates="booking", uselist=False)
 
+    __table_args__ = (
+        Index("ix_bookings_asset_window", "asset_id", "status", "start_at", "end_at"),
+        # Per-user dashboard version (latest change) without touching the table
+        Index("ix_bookings_user_updated", "user_id", "updated_at"),
+        # Keyset pages of the booking list, all bookings and per user
+        Index("ix_bookings_created", "created_at", "id"),
+        Index("ix_bookings_user_created", "user_id", "created_at", "id"),
+    )
+
 class BookingAudit(Base):
     __tablename__ = "booking_audits"
 
@@ -99,12 +117,21 @@ class BookingAudit(Base):
     performed_by_id = Column(Integer, ForeignKey("users.id"), nullable=True) # User who performed the action
     
     action = Column(String, nullable=False) # Created, Approved, Paid, Helper Text...
-    details = Column(JSON, nullable=True) # { "from_status": "pending", "to_status": "awaiting_payment" }
+    details = Column(JSONCodec, nullable=True) # { "from_status": "pending", "to_status": "awaiting_payment" }
     timestamp = Column(DateTime, default=datetime.utcnow)
 
     booking = relationship("Booking", back_populates="audits")
     performed_by = relationship("User")
 
+    __table_args__ = (
+        # Audit log queries (crud.get_booking_audits): newest first, keyset-paged on
+        # (timestamp, id), unfiltered or by booking, actor or action
+        Index("ix_booking_audits_timestamp", "timestamp", "id"),
+        Index("ix_booking_audits_booking", "booking_id", "timestamp", "id"),
+        Index("ix_booking_audits_actor", "performed_by_id", "timestamp", "id"),
+        Index("ix_booking_audits_action", "action", "timestamp", "id"),
+    )
+
 class Payment(Base):
     __tablename__ = "payments"
 
@@ -136,3 +163,24 @@ class Feedback(Base):
     booking = relationship("Booking", back_populates="feedback")
     asset = relationship("Asset", back_populates="feedbacks")
     user = relationship("User", back_populates="feedbacks")
+
+class DashboardCounters(Base):
+    # Running totals for the admin dashboards, split over counters.SHARDS rows that are summed
+    # on read. Updated in the same transaction as the rows they count; reconcile_counters.py
+    # rebuilds them from the tables.
+    __tablename__ = "dashboard_counters"
+
+    id = Column(Integer, primary_key=True)
+    users = Column(Integer, default=0, nullable=False)
+    assets = Column(Integer, default=0, nullable=False)
+    active_assets = Column(Integer, default=0, nullable=False)
+    bookings = Column(Integer, default=0, nullable=False)
+    # One column per workflow status; bookings in any other status only count in `bookings`
+    bookings_pending = Column(Integer, default=0, nullable=False)
+    bookings_awaiting_payment = Column(Integer, default=0, nullable=False)
+    bookings_paid = Column(Integer, default=0, nullable=False)
+    bookings_in_possession = Column(Integer, default=0, nullable=False)
+    bookings_returned = Column(Integer, default=0, nullable=False)
+    bookings_overdue = Column(Integer, default=0, nullable=False)
+    bookings_cancelled = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,47 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from fastapi import HTTPException, Request, Response
+
+# Keyset pagination. A cursor is the sort key of the last row of a page, as base64url
+# JSON; the next page seeks strictly past that key through an index, so a deep page
+# costs the same as the first one and rows inserted meanwhile don't shift later pages.
+# List endpoints keep returning plain arrays and send the cursor for the next page in
+# X-Next-Cursor (and a Link: rel="next" header); it's absent on the last page.
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(*key) -> str:
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in key]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """Key values from a cursor, converted with `types` (int, datetime, ...); 400 if malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for value, kind in zip(values, types)
+        )
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def next_cursor(items, limit: int, key):
+    """Cursor for the page after `items`, or None when it was the last one."""
+    if len(items) < limit:
+        return None
+    return encode_cursor(*key(items[-1]))
+
+
+def set_next_cursor(request: Request, response: Response, cursor: str):
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+        response.headers["Link"] = f'<{request.url.include_query_params(cursor=cursor)}>; rel="next"'
@@ -1,87 +1,170 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, schemas, auth
-from ..database import SessionLocal
+import csv
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from datetime import datetime
+from .. import crud_async, schemas, auth, availability, export, pagination, serialization
+from ..database import get_db
 
 router = APIRouter(
     prefix="/api",
     tags=["Admin"]
 )
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Bookings per bulk status change request
+MAX_BULK_BOOKINGS = 1000
 
 # User Management (Admin)
 @router.get("/users", response_model=List[schemas.User])
-def list_users(current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
+async def list_users(
+    request: Request,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: schemas.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
     if current_user.role != "admin":
         raise HTTPException(status_code=401, detail="Unauthorized")
-    return crud.get_users(db)
+    after_id = pagination.decode_cursor(cursor, int)[0] if cursor else None
+    users = await crud_async.get_users(db, after_id=after_id, limit=limit)
+    response = serialization.response(schemas.User, users)
+    pagination.set_next_cursor(request, response, pagination.next_cursor(users, limit, lambda user: (user.id,)))
+    return response
 
 @router.get("/users/{user_id}", response_model=schemas.User)
-def get_user_details(user_id: int, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
+async def get_user_details(user_id: int, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
     if current_user.role != "admin":
         raise HTTPException(status_code=401, detail="Unauthorized")
-    user = crud.get_user(db, user_id)
+    user = await crud_async.get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return serialization.response(schemas.User, user)
 
 @router.patch("/users/{user_id}/status", response_model=schemas.User)
-def update_user_status(user_id: int, status_update: schemas.UserUpdate, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
+async def update_user_status(user_id: int, status_update: schemas.UserUpdate, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
     if current_user.role != "admin":
         raise HTTPException(status_code=401, detail="Unauthorized")
-    return crud.update_user_status(db, user_id, status_update.status)
+    return await crud_async.update_user_status(db, user_id, status_update.status)
 
 @router.delete("/users/{user_id}")
-def delete_user(user_id: int, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
+async def delete_user(user_id: int, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
     if current_user.role != "admin":
         raise HTTPException(status_code=401, detail="Unauthorized")
-    crud.delete_user(db, user_id)
+    await crud_async.delete_user(db, user_id)
     return {"message": "User deleted"}
 
 # Admin Asset Management
 @router.post("/assets", response_model=schemas.Asset)
-def create_asset(asset: schemas.AssetCreate, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
+async def create_asset(asset: schemas.AssetCreate, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
     if current_user.role != "admin":
         raise HTTPException(status_code=401, detail="Unauthorized")
-    return crud.create_asset(db, asset)
+    return await crud_async.create_asset(db, asset)
+
+@router.post("/assets/import", response_model=schemas.AssetImportReport)
+async def import_assets(
+    file: UploadFile = File(...),
+    format: Literal["csv", "ndjson"] = "csv",
+    atomic: bool = False,
+    current_user: schemas.User = Depends(auth.get_current_active_user)
+):
+    # Invalid records are skipped and reported by line; atomic=true imports nothing if any fails
+    if current_user.role != "admin":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    try:
+        return await crud_async.import_assets(file.file, format, atomic)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Unreadable file: {e}")
 
 @router.put("/assets/{asset_id}", response_model=schemas.Asset)
-def update_asset(asset_id: int, asset: schemas.AssetUpdate, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
+async def update_asset(asset_id: int, asset: schemas.AssetUpdate, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
     if current_user.role != "admin":
         raise HTTPException(status_code=401, detail="Unauthorized")
-    return crud.update_asset(db, asset_id, asset, user_id=current_user.id)
+    return await crud_async.update_asset(db, asset_id, asset, user_id=current_user.id)
 
 @router.delete("/assets/{asset_id}")
-def delete_asset(asset_id: int, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
+async def delete_asset(asset_id: int, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
     if current_user.role != "admin":
         raise HTTPException(status_code=401, detail="Unauthorized")
-    crud.delete_asset(db, asset_id)
+    await crud_async.delete_asset(db, asset_id)
     return {"message": "Asset deleted"}
 
 # Admin Booking Management
 @router.patch("/bookings/{booking_id}/status", response_model=schemas.Booking)
-def update_booking_status(booking_id: int, status_update: schemas.BookingUpdateStatus, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
+async def update_booking_status(booking_id: int, status_update: schemas.BookingUpdateStatus, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return await crud_async.update_booking_status(db, booking_id, status_update.status, current_user.id)
+
+# Bulk status change: every transition and its audit row in one transaction
+@router.patch("/bookings/status", response_model=List[schemas.BookingStatusResult])
+async def update_booking_statuses(status_update: schemas.BookingBulkStatusUpdate, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    if not 1 <= len(status_update.booking_ids) <= MAX_BULK_BOOKINGS:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_BULK_BOOKINGS} booking ids are required")
+    return await crud_async.update_booking_statuses(db, status_update.booking_ids, status_update.status, current_user.id)
+
+# Audit log: newest first, filtered by booking, actor, action and time (from inclusive, to exclusive)
+@router.get("/admin/audits", response_model=List[schemas.BookingAuditRecord])
+async def list_booking_audits(
+    request: Request,
+    booking_id: Optional[int] = None,
+    performed_by_id: Optional[int] = None,
+    action: Optional[str] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: schemas.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    start = availability.to_utc(start) if start else None
+    end = availability.to_utc(end) if end else None
+    before = pagination.decode_cursor(cursor, datetime, int) if cursor else None
+    audits = await crud_async.get_booking_audits(
+        db, booking_id=booking_id, performed_by_id=performed_by_id, action=action,
+        since=start, until=end, before=before, limit=limit
+    )
+    response = serialization.response(schemas.BookingAuditRecord, audits)
+    pagination.set_next_cursor(request, response, pagination.next_cursor(audits, limit, lambda entry: (entry.timestamp, entry.id)))
+    return response
+
+# Exports (reconciliation): the whole table, streamed
+@router.get("/admin/export/{name}")
+async def export_records(
+    name: Literal["bookings", "payments", "audits"],
+    format: Literal["csv", "ndjson"] = "csv",
+    status: Optional[str] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    current_user: schemas.User = Depends(auth.get_current_active_user)
+):
     if current_user.role != "admin":
         raise HTTPException(status_code=401, detail="Unauthorized")
-    return crud.update_booking_status(db, booking_id, status_update.status, current_user.id)
+    # from/to bound the record's creation time (audits: its timestamp), to exclusive
+    start = availability.to_utc(start) if start else None
+    end = availability.to_utc(end) if end else None
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        export.stream(name, format, start, end, status),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 # Stats
 @router.get("/stats")
-def get_stats(current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
+async def get_stats(current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
     if current_user.role != "admin":
         raise HTTPException(status_code=401, detail="Unauthorized")
-    return crud.get_stats(db)
+    return await crud_async.get_stats(db)
 
 @router.get("/admin/dashboard-stats", response_model=schemas.AdminDashboardStats)
-def get_admin_dashboard_stats(current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
+async def get_admin_dashboard_stats(current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
     if current_user.role != "admin":
         raise HTTPException(status_code=401, detail="Unauthorized")
-    return crud.get_admin_dashboard_stats(db)
+    return await crud_async.get_admin_dashboard_stats(db)
@@ -1,29 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from .. import crud, schemas, auth
-from ..database import SessionLocal
+from .. import crud_async, schemas, auth
+from ..database import get_db
 
 router = APIRouter(
     prefix="/api",
     tags=["Auth"]
 )
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/register", response_model=schemas.Token)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await crud_async.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already exists")
-    new_user = crud.create_user(db, user=user)
+    hashed_password = await auth.get_password_hash_async(user.password)
+    new_user = await crud_async.create_user(db, user=user, hashed_password=hashed_password)
     
     # Create Access Token
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -33,23 +26,15 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer", "user": new_user}
 
 @router.post("/login", response_model=schemas.Token)
-async def login(request: Request, db: Session = Depends(get_db)):
+async def login(request: Request, db: AsyncSession = Depends(get_db)):
     data = await request.json()
     email = data.get("email") or data.get("username")
     password = data.get("password")
     
-    user = crud.get_user_by_email(db, email=email)
-    if not user or not auth.verify_password(password, user.password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+    user = await auth.authenticate_user(db, email, password)
     
     # Increment login count
-    user.login_count += 1
-    db.commit()
-    db.refresh(user)
+    user = await crud_async.record_login(db, user.id)
 
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
@@ -58,14 +43,8 @@ async def login(request: Request, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer", "user": user}
 
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = crud.get_user_by_email(db, email=form_data.username)
-    if not user or not auth.verify_password(form_data.password, user.password):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await auth.authenticate_user(db, form_data.username, form_data.password)
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
         data={"sub": user.email}, expires_delta=access_token_expires
@@ -73,17 +52,17 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     return {"access_token": access_token, "token_type": "bearer", "user": user}
 
 @router.post("/logout")
-def logout():
+async def logout():
     return {"message": "Logged out"}
 
 @router.get("/user", response_model=schemas.User)
-def read_users_me(current_user: schemas.User = Depends(auth.get_current_active_user)):
+async def read_users_me(current_user: schemas.User = Depends(auth.get_current_active_user)):
     return current_user
 
 @router.put("/user/profile", response_model=schemas.User)
-def update_user_profile(
+async def update_user_profile(
     profile_data: schemas.UserProfileUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: schemas.User = Depends(auth.get_current_active_user)
 ):
-    return crud.update_user_profile(db, user_id=current_user.id, profile_data=profile_data)
+    return await crud_async.update_user_profile(db, user_id=current_user.id, profile_data=profile_data)
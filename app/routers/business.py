@@ -1,65 +1,126 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from .. import crud, schemas, auth
-from ..database import SessionLocal
+from datetime import datetime
+from .. import crud_async, schemas, auth, availability, http_cache, pagination, serialization
+from ..database import get_db
 
 router = APIRouter(
     prefix="/api",
     tags=["Business"]
 )
 
-# Dependency
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Catalog responses carry live availability counts, which can change at any moment, so caches
+# may store them but must revalidate on every use; an unchanged catalog revalidates with a 304.
+CATALOG_CACHE_CONTROL = "public, no-cache"
+
+def catalog_headers(key: str, version) -> dict:
+    parts, last_modified = version
+    return http_cache.validators(http_cache.make_etag(key, *parts), last_modified, CATALOG_CACHE_CONTROL)
 
 # Assets Retrieval (Public/Business)
 @router.get("/assets", response_model=List[schemas.Asset])
-def list_assets(location: Optional[str] = None, type: Optional[str] = None, search: Optional[str] = None,  db: Session = Depends(get_db)):
-    return crud.get_assets(db, location=location, type=type)
+async def list_assets(
+    request: Request,
+    location: Optional[str] = None,
+    type: Optional[str] = None,
+    search: Optional[str] = None,
+    available_from: Optional[datetime] = Query(None, alias="from"),
+    available_to: Optional[datetime] = Query(None, alias="to"),
+    quantity: int = Query(1, ge=1),
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    # from/to restrict the list to assets with `quantity` units free for that whole window
+    if (available_from is None) != (available_to is None):
+        raise HTTPException(status_code=400, detail="Both 'from' and 'to' are required for a date range search")
+    if available_from:
+        available_from, available_to = availability.to_utc(available_from), availability.to_utc(available_to)
+        if available_from > available_to:
+            raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    search = (search or "").strip() or None
+    # Search pages are in relevance order, keyed on (rank, id)
+    after = pagination.decode_cursor(cursor, *((float, int) if search else (int,))) if cursor else None
+    key = f"assets?{request.url.query}"
+    version, assets, last_key = await crud_async.get_assets_if_modified(
+        db, lambda version: http_cache.is_fresh(request, catalog_headers(key, version)),
+        after=after, limit=limit, location=location, type=type, search=search,
+        available_from=available_from, available_to=available_to, quantity=quantity
+    )
+    headers = catalog_headers(key, version)
+    if assets is None:
+        return http_cache.not_modified(headers)
+    response = serialization.response(schemas.Asset, assets, headers)
+    pagination.set_next_cursor(request, response, pagination.next_cursor(assets, limit, lambda last: last_key))
+    return response
+
+# Declared before /assets/{asset_id} so "calendar" isn't taken for an id
+@router.get("/assets/calendar", response_model=List[schemas.AssetCalendar])
+async def get_asset_calendars(ids: List[int] = Query(..., max_length=200), days: int = Query(90, ge=1, le=366), db: AsyncSession = Depends(get_db)):
+    return await crud_async.get_asset_calendars(db, ids, days)
 
 @router.get("/assets/{asset_id}", response_model=schemas.Asset)
-def get_asset(asset_id: int, db: Session = Depends(get_db)):
-    asset = crud.get_asset(db, asset_id)
-    if not asset:
+async def get_asset(asset_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    key = f"asset/{asset_id}"
+    version, asset = await crud_async.get_asset_if_modified(
+        db, asset_id, lambda version: http_cache.is_fresh(request, catalog_headers(key, version))
+    )
+    if version is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    headers = catalog_headers(key, version)
+    if asset is None:
+        return http_cache.not_modified(headers)
+    return serialization.response(schemas.Asset, asset, headers)
+
+@router.get("/assets/{asset_id}/calendar", response_model=schemas.AssetCalendar)
+async def get_asset_calendar(asset_id: int, days: int = Query(90, ge=1, le=366), db: AsyncSession = Depends(get_db)):
+    calendars = await crud_async.get_asset_calendars(db, [asset_id], days)
+    if not calendars:
         raise HTTPException(status_code=404, detail="Asset not found")
-    return asset
+    return calendars[0]
 
 # Booking Management (Business)
-@router.get("/bookings", response_model=List[schemas.Booking])
-def list_bookings(current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
+@router.get("/bookings", response_model=List[schemas.BookingSummary])
+async def list_bookings(
+    request: Request,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: schemas.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
     filter_user_id = current_user.id if current_user.role != "admin" else None
-    return crud.get_bookings(db, user_id=filter_user_id)
+    before = pagination.decode_cursor(cursor, datetime, int) if cursor else None
+    bookings = await crud_async.get_bookings(db, user_id=filter_user_id, before=before, limit=limit)
+    response = serialization.response(schemas.BookingSummary, bookings)
+    pagination.set_next_cursor(request, response, pagination.next_cursor(bookings, limit, lambda booking: (booking.created_at, booking.id)))
+    return response
 
 @router.post("/bookings", response_model=schemas.Booking)
-def create_booking(booking_data: schemas.BookingCreate, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
-    return crud.create_booking(db, booking_data, current_user.id)
+async def create_booking(booking_data: schemas.BookingCreate, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
+    return await crud_async.create_booking(db, booking_data, current_user.id)
 
 @router.get("/bookings/{booking_id}", response_model=schemas.Booking)
-def get_booking(booking_id: int, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
-    booking = crud.get_booking(db, booking_id)
+async def get_booking(booking_id: int, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
+    booking = await crud_async.get_booking(db, booking_id)
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     if current_user.role != "admin" and booking.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view this booking")
-    return booking
+    return serialization.response(schemas.Booking, booking)
 
 @router.post("/bookings/{booking_id}/cancel", response_model=schemas.Booking)
-def cancel_booking(booking_id: int, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
-    return crud.cancel_booking(db, booking_id, current_user.id)
+async def cancel_booking(booking_id: int, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
+    return await crud_async.cancel_booking(db, booking_id, current_user.id)
 
 @router.post("/bookings/{booking_id}/pay", response_model=schemas.Payment)
-def process_payment(booking_id: int, payment: schemas.PaymentCreate, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
-    return crud.create_payment(db, booking_id, payment, current_user.id)
+async def process_payment(booking_id: int, payment: schemas.PaymentCreate, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
+    return await crud_async.create_payment(db, booking_id, payment, current_user.id)
 
 @router.get("/bookings/{booking_id}/receipt")
-def get_receipt(booking_id: int, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
+async def get_receipt(booking_id: int, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
     # Simple Receipt Generation
-    booking = crud.get_booking(db, booking_id)
+    booking = await crud_async.get_booking(db, booking_id)
     if not booking or (booking.user_id != current_user.id and current_user.role != "admin"):
         raise HTTPException(status_code=404, detail="Booking not found")
     
@@ -86,9 +147,18 @@ def get_receipt(booking_id: int, current_user: schemas.User = Depends(auth.get_c
     return {"content": receipt_text}
 
 @router.post("/bookings/{booking_id}/feedback", response_model=schemas.Feedback)
-def submit_feedback(booking_id: int, feedback: schemas.FeedbackCreate, current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
-    return crud.create_feedback(db, booking_id, feedback, current_user.id)
+async def submit_feedback(booking_id: int, feedback: schemas.FeedbackCreate, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
+    return await crud_async.create_feedback(db, booking_id, feedback, current_user.id)
 
 @router.get("/user/dashboard", response_model=schemas.UserDashboardStats)
-def get_user_dashboard_stats(current_user: schemas.User = Depends(auth.get_current_active_user), db: Session = Depends(get_db)):
-    return crud.get_user_dashboard_stats(db, current_user.id)
+async def get_user_dashboard_stats(request: Request, response: Response, current_user: schemas.User = Depends(auth.get_current_active_user), db: AsyncSession = Depends(get_db)):
+    # Polled often: unchanged bookings answer 304 from the version lookup alone
+    latest, count = await crud_async.get_user_dashboard_version(db, current_user.id)
+    # Per-user data: browsers may keep it but must revalidate, shared caches must not store it
+    headers = http_cache.validators(
+        http_cache.make_etag("user-dashboard", current_user.id, count, latest), cache_control="private, no-cache"
+    )
+    if http_cache.is_fresh(request, headers):
+        return http_cache.not_modified(headers)
+    response.headers.update(headers)
+    return await crud_async.get_user_dashboard_stats(db, current_user.id)
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-import shutil
+from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+import hashlib
 import os
-import uuid
-from typing import List
+import re
+import tempfile
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
 
 router = APIRouter(
     prefix="/api/upload",
@@ -11,22 +14,162 @@ router = APIRouter(
 
 UPLOAD_DIR = "static/uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Uploads in progress, outside the /static mount so a partial or rejected file is never
+# served. Must be on the same filesystem as UPLOAD_DIR: finished files are moved across
+# with os.replace, which is atomic only within one filesystem.
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR", "uploads_tmp")
+os.makedirs(UPLOAD_TMP_DIR, mode=0o700, exist_ok=True)
 
-@router.post("/", response_model=dict)
-async def upload_file(file: UploadFile = File(...)):
+# Largest accepted file, in bytes
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+# Allowance for the multipart framing around the file (boundaries, part headers, other fields)
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Uploads are stored content-addressed, as <sha256 of the bytes><extension>: the same image
+# uploaded again maps to the file already there, and nothing new is written. The request body
+# is parsed as it arrives; the file part is hashed and written to a temporary file in
+# UPLOAD_TMP_DIR chunk by chunk on the worker pool (never on the event loop), and moved into
+# UPLOAD_DIR under its final name once the hash is known. The upload is refused with 413 as
+# soon as it passes MAX_UPLOAD_BYTES, or before reading anything (and before any temporary
+# file exists) when Content-Length says so. Every other way out of the request, errors and
+# cancellation included, deletes the temporary file.
+
+_EXTENSION = re.compile(r"\.[A-Za-z0-9]{1,10}")
+
+
+class _FileReceiver:
+    """Multipart callbacks that collect the data of the `file` part."""
+
+    def __init__(self):
+        self.filename = None
+        self.found = False
+        self.pending = []
+        self._in_file = False
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self._disposition = b""
+        self._in_file = False
+
+    def on_header_field(self, data, start, end):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        # Only the first `file` part counts; other fields are skipped
+        if options.get(b"name") == b"file" and b"filename" in options and not self.found:
+            self.found = self._in_file = True
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+
+    def on_part_data(self, data, start, end):
+        if self._in_file:
+            self.pending.append(data[start:end])
+
+    def on_part_end(self):
+        self._in_file = False
+
+
+def _extension(filename: str) -> str:
+    extension = os.path.splitext(filename or "")[1]
+    return extension.lower() if _EXTENSION.fullmatch(extension) else ""
+
+
+def _write(out, digest, data: bytes):
+    digest.update(data)
+    out.write(data)
+
+
+def _store(temp_path: str, name: str) -> str:
+    # Content-addressed: a file with this name already holds these bytes
+    path = os.path.join(UPLOAD_DIR, name)
+    if os.path.exists(path):
+        os.remove(temp_path)
+    else:
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    return name
+
+
+def _discard(out, temp_path: str):
+    out.close()
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+def _too_large():
+    return HTTPException(status_code=413, detail=f"File too large. The limit is {MAX_UPLOAD_BYTES} bytes.")
+
+
+@router.post("/", response_model=dict, openapi_extra={
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {"file": {"type": "string", "format": "binary"}},
+        }}},
+    },
+})
+async def upload_file(request: Request):
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body with a 'file' field")
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD:
+        raise _too_large()
+
+    receiver = _FileReceiver()
+    parser = MultipartParser(options[b"boundary"], receiver.callbacks())
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = await run_in_threadpool(tempfile.mkstemp, dir=UPLOAD_TMP_DIR, prefix="upload-")
+    out = os.fdopen(fd, "wb")
     try:
-        # Generate unique filename
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = os.path.join(UPLOAD_DIR, unique_filename)
-        
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # Return URL (assuming server runs on localhost:8000 for now, ideally use env var)
-        # In production this might be a CDN or S3 URL
-        file_url = f"http://127.0.0.1:8000/static/uploads/{unique_filename}"
-        
-        return {"url": file_url}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Could not upload file: {str(e)}")
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if receiver.pending:
+                data = b"".join(receiver.pending)
+                receiver.pending.clear()
+                size += len(data)
+                if size > MAX_UPLOAD_BYTES:
+                    raise _too_large()
+                await run_in_threadpool(_write, out, digest, data)
+        parser.finalize()
+        if not receiver.found:
+            raise HTTPException(status_code=400, detail="No 'file' field in the upload")
+        await run_in_threadpool(out.close)
+        name = await run_in_threadpool(_store, temp_path, f"{digest.hexdigest()}{_extension(receiver.filename)}")
+    except FormParserError:
+        _discard(out, temp_path)
+        raise HTTPException(status_code=400, detail="Malformed multipart body")
+    except BaseException:
+        # Also on cancellation (client gone), so no await here
+        _discard(out, temp_path)
+        raise
+
+    # Return URL (assuming server runs on localhost:8000 for now, ideally use env var)
+    # In production this might be a CDN or S3 URL
+    file_url = f"http://127.0.0.1:8000/static/uploads/{name}"
+
+    return {"url": file_url}
@@ -0,0 +1,90 @@
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from . import models
+from .availability import parse_booking_dates
+
+# Schema upgrades for databases created by an older version of the app, run at startup
+# (main.py) right after create_all, which only creates missing tables. Every step checks
+# first, so on an up-to-date database upgrade() changes nothing:
+#   1. columns the models have and the tables lack are added (ALTER TABLE ... ADD COLUMN)
+#   2. bookings.start_at/end_at, when just added, are backfilled from the JSON `dates`
+#   3. indexes the models declare and the database lacks are created
+# The derived tables come after it in main.py: the assets_fts search index, then the
+# dashboard counters.
+#
+# The standalone scripts do the same by hand, e.g. on a copy of a database before a deploy.
+# On a database that predates them all, run them in this order:
+#   add_tracking_columns.py, add_booking_window_columns.py, add_booking_version_column.py,
+#   add_booking_indexes.py, rebuild_asset_search.py, reconcile_counters.py
+
+logger = logging.getLogger(__name__)
+
+
+def _column_ddl(column, dialect) -> str:
+    ddl = f"{column.name} {column.type.compile(dialect=dialect)}"
+    if not column.nullable:
+        # Existing rows need a value: only columns with a plain default can be added this way
+        default = column.default.arg if column.default is not None and column.default.is_scalar else None
+        if default is None:
+            raise RuntimeError(
+                f"Cannot add {column.table.name}.{column.name} to the existing database automatically; "
+                "it is NOT NULL without a plain default. Add it by hand before starting the app."
+            )
+        ddl += f" DEFAULT {int(default) if isinstance(default, bool) else default!r} NOT NULL"
+    return ddl
+
+
+def add_missing_columns(engine: Engine) -> list:
+    """Add the model columns the database tables lack. Returns them as "table.column"."""
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.c:
+                if column.name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {_column_ddl(column, engine.dialect)}"))
+                    added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def backfill_booking_windows(conn) -> tuple:
+    """Fill bookings.start_at/end_at from the JSON `dates` where they are empty.
+    Returns (filled, unparseable booking ids)."""
+    rows = conn.execute(text("SELECT id, dates FROM bookings WHERE start_at IS NULL")).fetchall()
+    filled, unparseable = 0, []
+    for booking_id, dates in rows:
+        window = parse_booking_dates(dates)
+        if not window:
+            unparseable.append(booking_id)
+            continue
+        # Go through the ORM table so DateTime values are stored in SQLAlchemy's format
+        conn.execute(
+            models.Booking.__table__.update()
+            .where(models.Booking.id == booking_id)
+            .values(start_at=window[0], end_at=window[1])
+        )
+        filled += 1
+    return filled, unparseable
+
+
+def create_missing_indexes(engine: Engine):
+    with engine.begin() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def upgrade(engine: Engine):
+    """Bring an existing database up to the current models (see above)."""
+    added = add_missing_columns(engine)
+    if added:
+        logger.warning("Schema upgraded", extra={"added_columns": added})
+    if "bookings.start_at" in added:
+        with engine.begin() as conn:
+            filled, unparseable = backfill_booking_windows(conn)
+        logger.warning("Booking windows backfilled", extra={"filled": filled, "unparseable": unparseable})
+    create_missing_indexes(engine)
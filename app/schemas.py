@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional, Any, Dict
-from datetime import datetime
+from datetime import datetime, date
 
 # User Schemas
 class UserBase(BaseModel):
@@ -82,6 +82,22 @@ class Asset(AssetBase):
     class Config:
         from_attributes = True
 
+class AssetCalendar(BaseModel):
+    asset_id: int
+    total_quantity: int
+    start: date
+    free: List[int] # free units per day, free[i] is for start + i days
+
+class AssetImportError(BaseModel):
+    line: int # line of the CSV / JSON Lines input
+    errors: List[str]
+
+class AssetImportReport(BaseModel):
+    created: int
+    failed: int
+    errors: List[AssetImportError] # the first 1000 failures
+    ids: List[int] # of the created assets, in input order
+
 # Booking Schemas
 class BookingBase(BaseModel):
     asset_id: int
@@ -109,6 +125,10 @@ class BookingAuditResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Audit log query rows (GET /api/admin/audits)
+class BookingAuditRecord(BookingAuditResponse):
+    booking_id: int
+
 # Feedback Schemas
 class FeedbackBase(BaseModel):
     rating: int
@@ -166,6 +186,55 @@ class Booking(BookingBase):
     class Config:
         from_attributes = True
 
+# Bulk status change (admin): outcome is updated, unchanged (already in that status),
+# not_found, or conflict (changed by another request meanwhile)
+class BookingBulkStatusUpdate(BaseModel):
+    booking_ids: List[int]
+    status: str
+
+class BookingStatusResult(BaseModel):
+    booking_id: int
+    outcome: str
+    previous_status: Optional[str] = None
+
+# Booking list rows: no audits, payments or feedback, and only the user/asset fields a
+# list shows. The full Booking is served by GET /api/bookings/{id}.
+class BookingUserSummary(BaseModel):
+    id: int
+    email: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    business_name: Optional[str] = None
+    phone: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class BookingAssetSummary(BaseModel):
+    id: int
+    name: str
+    type: str
+    location: str
+    cost: str
+    images: Optional[List[str]] = None
+
+    class Config:
+        from_attributes = True
+
+class BookingSummary(BookingBase):
+    id: int
+    reference_code: str
+    user_id: int
+    status: str
+    payment_status: str
+    total_amount: Optional[str] = None
+    created_at: datetime
+    user: Optional[BookingUserSummary] = None
+    asset: Optional[BookingAssetSummary] = None
+
+    class Config:
+        from_attributes = True
+
 # Stats Schema
 class Stats(BaseModel):
     users: int
@@ -0,0 +1,53 @@
+from functools import lru_cache
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from . import json_codec, schemas
+
+# JSON bodies for the large list and detail endpoints, rendered once, straight to bytes.
+#
+# Left to FastAPI, a response is validated again against response_model and then encoded;
+# on the releases requirements.txt allows that is jsonable_encoder + json.dumps, several
+# times the cost of the query for a big admin list. Here each schema has a prebuilt
+# TypeAdapter: crud_async validates the ORM rows with it (from_attributes, inside run_sync)
+# and the route dumps the models to JSON in pydantic-core and sends the bytes as they are.
+# Routes keep their response_model, which still documents the body in OpenAPI.
+
+
+@lru_cache(maxsize=None)
+def adapter(schema, many: bool = False) -> TypeAdapter:
+    """The TypeAdapter for `schema`, or for a list of it; built once per process."""
+    return TypeAdapter(List[schema] if many else schema)
+
+
+def validate(schema, value):
+    """`schema` model(s) for an ORM object or a list of them."""
+    if isinstance(value, list):
+        return adapter(schema, many=True).validate_python(value, from_attributes=True)
+    return adapter(schema).validate_python(value, from_attributes=True)
+
+
+class JSONBytesResponse(JSONResponse):
+    """JSON response that sends pre-rendered bytes as is and encodes anything else with
+    orjson (datetimes, dicts with non-str keys, models via the FastAPI encoder), or the
+    stdlib path when json_codec could not import it."""
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if json_codec.orjson is None:
+            return super().render(jsonable_encoder(content))
+        return json_codec.orjson.dumps(content, default=jsonable_encoder, option=json_codec.orjson.OPT_NON_STR_KEYS)
+
+
+def response(schema, value, headers: dict = None) -> JSONBytesResponse:
+    """Response for `schema` model(s) from validate(), dumped by the prebuilt adapter."""
+    body = adapter(schema, many=isinstance(value, list)).dump_json(value)
+    return JSONBytesResponse(body, headers=headers)
+
+
+# Build the adapters of the hot routes at import rather than on their first request
+for _schema in (schemas.BookingSummary, schemas.Booking, schemas.Asset, schemas.User):
+    adapter(_schema)
+    adapter(_schema, many=True)
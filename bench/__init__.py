@@ -0,0 +1,3 @@
+# Benchmarks for the performance work on the API, one module per change. Each runs on a
+# throwaway database (see common.use_tmp_db) and prints a table; run them from the
+# repository root, e.g. python -m bench.catalog
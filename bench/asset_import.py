@@ -0,0 +1,53 @@
+import io
+import sys
+import time
+from bench import common
+
+# Inserting N assets on a throwaway database:
+#   one-by-one  - crud.create_asset per asset (commit + refresh each), as seed_db used to
+#   import      - asset_import.import_assets from a CSV file: validated record by record,
+#                 inserted in CHUNK_SIZE executemany batches, one commit
+# Usage: python -m bench.asset_import [assets]
+
+ASSETS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+common.use_tmp_db()
+
+import main  # noqa: E402
+from app import asset_import, counters, crud, schemas  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+
+
+def record(i):
+    return {"name": f"Bench Asset {i}", "type": "Equipment", "location": "Abuja", "cost": "1000",
+            "description": "Bench asset for the bulk import", "total_quantity": 2}
+
+
+def csv_file(first):
+    lines = ["name,type,location,cost,description,specs,total_quantity"]
+    lines += [f'Bench Asset {i},Equipment,Abuja,1000,Bench asset for the bulk import,"{{""power"": ""2000W""}}",2'
+              for i in range(first, first + ASSETS)]
+    return io.BytesIO("\n".join(lines).encode())
+
+
+if __name__ == "__main__":
+    main.seed_db()
+    db = SessionLocal()
+    started = time.perf_counter()
+    for i in range(ASSETS):
+        crud.create_asset(db, schemas.AssetCreate(**record(i)))
+    one_by_one = time.perf_counter() - started
+
+    data = csv_file(ASSETS)
+    started = time.perf_counter()
+    report = asset_import.import_assets(db, asset_import.read(data, "csv"))
+    bulk = time.perf_counter() - started
+    assert report["created"] == ASSETS and not report["failed"], report
+
+    stored = counters.read(db)
+    assert stored.assets == counters.count(db)["assets"]
+    db.close()
+    print(f"assets={ASSETS}")
+    print(f"{'mode':<12} {'s':>8} {'assets/s':>10}")
+    for mode, seconds in (("one-by-one", one_by_one), ("import", bulk)):
+        print(f"{mode:<12} {seconds:>8.2f} {ASSETS / seconds:>10.0f}")
@@ -0,0 +1,84 @@
+import sys
+import time
+from datetime import datetime, timedelta
+from bench import common
+
+# Audit log queries (crud.get_booking_audits, one 100-row page) on a throwaway database of
+# N audit rows spread over a year, with and without the booking_audits indexes:
+#   actor/year   - one user's activity over the whole year
+#   actor deep   - the same user's 11th page
+#   booking      - one booking's history
+#   action/month - one action over one month
+#   all          - newest audits, unfiltered
+# Usage: python -m bench.audit_query [audits]
+
+AUDITS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+REPEAT = 5
+
+common.use_tmp_db()
+
+from sqlalchemy import insert  # noqa: E402
+import main  # noqa: E402
+from app import crud, models  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+
+ACTIONS = ["Created", "Status Updated", "Payment Received", "Cancelled"]
+START = datetime(2026, 1, 1)
+
+
+def fill():
+    step = timedelta(days=365) / AUDITS
+    with engine.begin() as conn:
+        for first in range(0, AUDITS, 50000):
+            conn.execute(insert(models.BookingAudit), [
+                {"booking_id": 1 + i // 4, "performed_by_id": 1 + i % 500, "action": ACTIONS[i % 4],
+                 "details": {"from": "pending", "to": "paid"}, "timestamp": START + step * i}
+                for i in range(first, min(first + 50000, AUDITS))
+            ])
+
+
+def deep_cursor(db, **filters):
+    before = None
+    for _ in range(10):
+        page = crud.get_booking_audits(db, before=before, **filters)
+        before = (page[-1].timestamp, page[-1].id)
+    return before
+
+
+def timed(db, **filters):
+    crud.get_booking_audits(db, **filters)
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        crud.get_booking_audits(db, **filters)
+        db.expunge_all()
+    return (time.perf_counter() - started) * 1000 / REPEAT
+
+
+def run(db):
+    month = (START + timedelta(days=180), START + timedelta(days=210))
+    cases = {
+        "actor/year": {"performed_by_id": 42, "since": START, "until": START + timedelta(days=365)},
+        "actor deep": {"performed_by_id": 42, "before": deep_cursor(db, performed_by_id=42)},
+        "booking": {"booking_id": AUDITS // 8},
+        "action/month": {"action": "Cancelled", "since": month[0], "until": month[1]},
+        "all": {},
+    }
+    return {name: timed(db, **filters) for name, filters in cases.items()}
+
+
+if __name__ == "__main__":
+    fill()
+    db = SessionLocal()
+    indexed = run(db)
+    db.close()
+    indexes = models.BookingAudit.__table__.indexes
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(conn)
+    db = SessionLocal()
+    plain = run(db)
+    db.close()
+    print(f"audits={AUDITS}")
+    print(f"{'query':<13} {'no index ms':>12} {'indexed ms':>11}")
+    for name in indexed:
+        print(f"{name:<13} {plain[name]:>12.2f} {indexed[name]:>11.2f}")
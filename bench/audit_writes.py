@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import time
+from bench import common
+
+# Audited actions per second through the API (status changes by an admin, one request
+# each, N bookings), on a throwaway database per mode:
+#   legacy        - the audit row committed on its own after the change (two commits)
+#   inline        - the audit row in the change's transaction (one commit, the default)
+#   write-behind  - AUDIT_WRITE_BEHIND_MS=200: audits batched by the background writer
+# Usage: python -m bench.audit_writes [bookings]
+
+BOOKINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+MODES = {"legacy": {}, "inline": {}, "write-behind": {"AUDIT_WRITE_BEHIND_MS": "200"}}
+
+
+def measure(mode):
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    import main
+    from app import audit, crud, models
+    from app.database import SessionLocal, async_engine
+
+    if mode == "legacy":
+        def create_booking_audit(db, booking_id, action, details, performed_by_id=None):
+            db.commit()
+            audit.record(db, booking_id, action, details, performed_by_id)
+            db.commit()
+        crud.create_booking_audit = create_booking_audit
+
+    commits = []
+    event.listen(async_engine.sync_engine, "commit", lambda *args: commits.append(1))
+    with TestClient(main.app) as client:
+        headers = common.admin_headers(client)
+        db = SessionLocal()
+        ids = common.add_bookings(db, BOOKINGS, asset_id=lambda i: 1 + i % 6)
+
+        commits.clear()
+        started = time.perf_counter()
+        for booking_id in ids:
+            response = client.patch(f"/api/bookings/{booking_id}/status", json={"status": "awaiting_payment"}, headers=headers)
+            assert response.status_code == 200, response.text
+        elapsed = time.perf_counter() - started
+        audit.flush()
+        written = db.query(models.BookingAudit).count()
+        db.close()
+    print(f"{mode:<13} {elapsed:>7.2f} {BOOKINGS / elapsed:>9.0f} {len(commits) / BOOKINGS:>12.1f} {written:>8}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        common.use_tmp_db()
+        measure(sys.argv[2])
+        sys.exit()
+    print(f"bookings={BOOKINGS}")
+    print(f"{'mode':<13} {'s':>7} {'actions/s':>9} {'commits/req':>12} {'audits':>8}")
+    # Each mode in a fresh interpreter: the settings are read when app is imported
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for mode, env in MODES.items():
+        result = subprocess.run(
+            [sys.executable, "-m", "bench.audit_writes", str(BOOKINGS), mode],
+            cwd=root, env={**os.environ, **env}, check=True, capture_output=True, text=True
+        )
+        # The last line is the measurement; seeding prints before it
+        print(result.stdout.strip().splitlines()[-1])
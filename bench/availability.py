@@ -0,0 +1,92 @@
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app import models, crud, availability
+
+# Compares computing available_quantity for a catalog page one asset at a time
+# against the batched path used by crud.get_assets, on a throwaway database.
+# Usage: python -m bench.availability
+
+SIZES = [(10, 10), (100, 10), (100, 100), (500, 100)]  # (assets, bookings per asset)
+STATUSES = ["pending", "awaiting_payment", "paid", "in_possession", "returned", "cancelled"]
+REPEAT = 5
+
+
+def build_db(path, n_assets, per_asset):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    owner = models.User(email="bench@fhsa.org", password="x")
+    db.add(owner)
+    db.flush()
+    now = datetime.utcnow()
+    assets = [
+        models.Asset(name=f"Asset {i}", type="Equipment", location="Abuja", cost="1000", total_quantity=20)
+        for i in range(n_assets)
+    ]
+    db.add_all(assets)
+    db.flush()
+    bookings = []
+    for asset in assets:
+        for j in range(per_asset):
+            start = now + timedelta(hours=random.randint(-24 * 30, 24 * 30))
+            end = start + timedelta(hours=random.randint(1, 24 * 7))
+            bookings.append(dict(
+                reference_code=f"BK-{asset.id}-{j}", user_id=owner.id, asset_id=asset.id,
+                dates={"start": start.isoformat() + "Z", "end": end.isoformat() + "Z"},
+                start_at=start, end_at=end, quantity=1, purpose="bench",
+                status=random.choice(STATUSES), payment_status="unpaid",
+            ))
+    db.bulk_insert_mappings(models.Booking, bookings)
+    db.commit()
+    db.close()
+    return engine
+
+
+def measure(engine, fn):
+    queries = 0
+
+    def count(*args):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    Session = sessionmaker(bind=engine)
+    timings = []
+    for _ in range(REPEAT):
+        availability.invalidate()  # cold cache: worst case after a booking write
+        db = Session()
+        started = time.perf_counter()
+        fn(db)
+        timings.append(time.perf_counter() - started)
+        db.close()
+    event.remove(engine, "before_cursor_execute", count)
+    return queries // REPEAT, min(timings) * 1000
+
+
+def per_asset(db):
+    assets = db.query(models.Asset).limit(1000).all()
+    for asset in assets:
+        availability.free_now(db, asset)
+
+
+def batched(db):
+    crud.get_assets(db, limit=1000)
+
+
+if __name__ == "__main__":
+    random.seed(7)
+    print(f"{'assets':>7} {'bookings':>9} | {'per-asset q':>11} {'ms':>8} | {'batched q':>9} {'ms':>8}")
+    for n_assets, per_asset_count in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = build_db(os.path.join(tmp, "bench.db"), n_assets, per_asset_count)
+            q1, t1 = measure(engine, per_asset)
+            q2, t2 = measure(engine, batched)
+            engine.dispose()
+        print(f"{n_assets:>7} {n_assets * per_asset_count:>9} | {q1:>11} {t1:>8.1f} | {q2:>9} {t2:>8.1f}")
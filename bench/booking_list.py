@@ -0,0 +1,73 @@
+import sys
+import time
+from datetime import timedelta
+from bench import common
+
+# Queries and time for one 100-row page of GET /api/bookings as an admin, on a throwaway
+# database where every booking has audits and a payment:
+#   legacy   - the old list: full schemas.Booking rows, audits/payments/feedback loaded
+#              lazily per booking while serializing
+#   summary  - the endpoint: schemas.BookingSummary from a single joined query
+# Usage: python -m bench.booking_list [bookings] [calls]
+
+BOOKINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+CALLS = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+common.use_tmp_db()
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+import main  # noqa: E402
+from app import models, schemas  # noqa: E402
+from app.database import SessionLocal, engine, async_engine  # noqa: E402
+
+queries = []
+for counted in (engine, async_engine.sync_engine):
+    event.listen(counted, "before_cursor_execute", lambda *args: queries.append(1))
+
+
+def legacy_list(db):
+    bookings = db.query(models.Booking).options(
+        joinedload(models.Booking.user), joinedload(models.Booking.asset)
+    ).order_by(models.Booking.created_at.desc()).limit(100).all()
+    for b in bookings:
+        for a in b.audits:
+            pass
+    return [schemas.Booking.model_validate(b).model_dump_json() for b in bookings]
+
+
+def measure(label, call):
+    queries.clear()
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        call()
+    elapsed = (time.perf_counter() - started) * 1000 / CALLS
+    print(f"{label:<8} {len(queries) / CALLS:>9.1f} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    with TestClient(main.app) as client:
+        headers = common.admin_headers(client)
+
+        db = SessionLocal()
+        start = common.BOOKING_START
+        ids = common.add_bookings(
+            db, BOOKINGS, asset_id=lambda i: 1 + i % 7, status="paid", payment_status="paid",
+            created_at=lambda i: start + timedelta(seconds=i), updated_at=start,
+        )
+        db.bulk_insert_mappings(models.BookingAudit, [
+            {"booking_id": booking_id, "action": action, "details": {"message": action}, "performed_by_id": 1}
+            for booking_id in ids for action in ("Created", "Payment Received")
+        ])
+        db.bulk_insert_mappings(models.Payment, [
+            {"booking_id": booking_id, "reference": f"PAY-{i}", "amount": "5000", "method": "card"}
+            for i, booking_id in enumerate(ids)
+        ])
+        db.commit()
+
+        print(f"bookings={BOOKINGS} page=100 calls={CALLS}")
+        print(f"{'list':<8} {'queries':>9} {'ms/call':>9}")
+        measure("legacy", lambda: legacy_list(db))
+        measure("summary", lambda: client.get("/api/bookings", headers=headers))
+        db.close()
@@ -0,0 +1,82 @@
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from bench import common
+
+# Latency of POST /api/bookings under different logging setups, on a throwaway database:
+#   default       - LOG_LEVEL=WARNING through the queue handler: nothing is written per request
+#   debug-queued  - app=DEBUG to a file, written by the listener thread
+#   legacy        - app=DEBUG appended on the request thread with an open()/write()/close()
+#                   per line, the way create_booking used to write debug_flow.txt
+# Usage: python -m bench.booking_logging [requests]
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+tmp = common.use_tmp_db()
+
+from fastapi.testclient import TestClient  # noqa: E402
+import main  # noqa: E402
+from app import models  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.logging_config import setup_logging  # noqa: E402
+
+
+class AppendPerLineHandler(logging.Handler):
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def emit(self, record):
+        with open(self.path, "a") as f:
+            f.write(self.format(record) + "\n")
+
+
+def configure(mode):
+    log_file = os.path.join(tmp, f"{mode}.log")
+    if mode == "default":
+        setup_logging(level="WARNING", levels="", log_file="")
+    elif mode == "debug-queued":
+        setup_logging(level="DEBUG", levels="", log_file=log_file)
+    else:
+        setup_logging(level="DEBUG", levels="", log_file="")
+        root = logging.getLogger("app")
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(AppendPerLineHandler(log_file))
+
+
+def run(client, headers, asset_id, offset):
+    timings = []
+    for i in range(REQUESTS):
+        start = datetime(2027, 1, 1) + timedelta(days=offset + i)
+        body = {
+            "asset_id": asset_id,
+            "dates": {"start": start.isoformat() + "Z", "end": (start + timedelta(hours=8)).isoformat() + "Z"},
+            "purpose": "bench",
+        }
+        started = time.perf_counter()
+        response = client.post("/api/bookings", json=body, headers=headers)
+        timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.text
+    return statistics.mean(timings), common.percentile(timings, 0.5), common.percentile(timings, 0.99)
+
+
+if __name__ == "__main__":
+    with TestClient(main.app) as client:
+        token = client.post("/api/register", json={"email": "bench@fhsa.org", "password": "bench", "business_name": "Bench"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        db = SessionLocal()
+        asset = models.Asset(name="Bench Asset", type="Equipment", location="Abuja", cost="1", total_quantity=1)
+        db.add(asset)
+        db.commit()
+        asset_id = asset.id
+        db.close()
+
+        print(f"{'mode':<14} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for n, mode in enumerate(["default", "debug-queued", "legacy", "default"]):
+            configure(mode)
+            mean, p50, p99 = run(client, headers, asset_id, n * REQUESTS)
+            print(f"{mode:<14} {mean:>8.2f} {p50:>8.2f} {p99:>8.2f}")
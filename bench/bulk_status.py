@@ -0,0 +1,51 @@
+import sys
+import time
+from bench import common
+
+# Approving N pending bookings on a throwaway database, through the API as an admin:
+#   one-by-one  - PATCH /api/bookings/{id}/status per booking
+#   bulk        - one PATCH /api/bookings/status with every id
+# Reports wall time and commits (COMMITs seen by the engines).
+# Usage: python -m bench.bulk_status [bookings]
+
+BOOKINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+common.use_tmp_db()
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+import main  # noqa: E402
+from app.database import SessionLocal, engine, async_engine  # noqa: E402
+
+commits = []
+for counted in (engine, async_engine.sync_engine):
+    event.listen(counted, "commit", lambda *args: commits.append(1))
+
+
+if __name__ == "__main__":
+    with TestClient(main.app) as client:
+        headers = common.admin_headers(client)
+        db = SessionLocal()
+        single_ids = common.add_bookings(db, BOOKINGS, asset_id=lambda i: 1 + i % 6)
+        bulk_ids = common.add_bookings(db, BOOKINGS, BOOKINGS, asset_id=lambda i: 1 + i % 6)
+        db.close()
+
+        results = []
+        commits.clear()
+        started = time.perf_counter()
+        for booking_id in single_ids:
+            response = client.patch(f"/api/bookings/{booking_id}/status", json={"status": "awaiting_payment"}, headers=headers)
+            assert response.status_code == 200, response.text
+        results.append(("one-by-one", time.perf_counter() - started, len(commits)))
+
+        commits.clear()
+        started = time.perf_counter()
+        response = client.patch("/api/bookings/status", json={"booking_ids": bulk_ids, "status": "awaiting_payment"}, headers=headers)
+        assert response.status_code == 200, response.text
+        assert all(result["outcome"] == "updated" for result in response.json())
+        results.append(("bulk", time.perf_counter() - started, len(commits)))
+
+    print(f"bookings={BOOKINGS}")
+    print(f"{'mode':<12} {'s':>8} {'commits':>8}")
+    for mode, seconds, count in results:
+        print(f"{mode:<12} {seconds:>8.2f} {count:>8}")
@@ -0,0 +1,51 @@
+import sys
+import time
+from bench import common
+
+# Time and bytes per catalog request with and without a validator, on a throwaway
+# database with a few hundred assets.
+# Usage: python -m bench.catalog [assets] [requests]
+
+ASSETS = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+REQUESTS = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+common.use_tmp_db()
+
+from fastapi.testclient import TestClient  # noqa: E402
+import main  # noqa: E402
+from app import models  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+
+
+def measure(client, label, url, headers=None):
+    size = 0
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        response = client.get(url, headers=headers)
+        size += len(response.content)
+    elapsed = (time.perf_counter() - started) * 1000 / REQUESTS
+    print(f"{label:<16} {response.status_code:>6} {elapsed:>9.2f} {size // REQUESTS:>9}")
+
+
+if __name__ == "__main__":
+    with TestClient(main.app) as client:
+        db = SessionLocal()
+        db.add_all(
+            models.Asset(name=f"Asset {i}", type="Equipment", location="Abuja", cost="1000",
+                         description="Bench asset " * 10, specs={"power": "2000W"}, images=["https://example.org/a.jpg"],
+                         duration_options=["day"], availability={"days": ["Mon", "Tue"]}, total_quantity=3)
+            for i in range(ASSETS)
+        )
+        db.commit()
+        db.close()
+
+        list_url = "/api/assets?limit=100"
+        list_etag = client.get(list_url).headers["etag"]
+        asset_etag = client.get("/api/assets/1").headers["etag"]
+
+        print(f"assets={ASSETS} requests={REQUESTS}")
+        print(f"{'request':<16} {'status':>6} {'ms/req':>9} {'bytes':>9}")
+        measure(client, "list", list_url)
+        measure(client, "list 304", list_url, {"If-None-Match": list_etag})
+        measure(client, "asset", "/api/assets/1")
+        measure(client, "asset 304", "/api/assets/1", {"If-None-Match": asset_etag})
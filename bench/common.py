@@ -0,0 +1,68 @@
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Shared by the bench modules: the throwaway database, seeding and result helpers.
+#
+# app.database reads DATABASE_URL / ASYNC_DATABASE_URL when it is first imported, so a bench
+# that only changed directory would still write into whatever database those point at.
+# use_tmp_db() sets both explicitly to a fresh file in a new temporary directory; call it
+# before importing main or anything from app. The seeding helpers import app lazily for
+# the same reason.
+
+ADMIN = {"email": "admin@fhsa.org", "password": "admin123"}  # seeded by main.seed_db
+BOOKING_START = datetime(2027, 1, 1)
+
+
+def use_tmp_db() -> str:
+    """Point the app at <new temp dir>/fhsa.db and chdir there (relative paths such as
+    static/uploads land there too). Returns the directory."""
+    if "app.database" in sys.modules:
+        raise RuntimeError("use_tmp_db() must run before app.database is imported")
+    tmp = tempfile.mkdtemp()
+    os.chdir(tmp)
+    path = os.path.join(tmp, "fhsa.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["ASYNC_DATABASE_URL"] = f"sqlite+aiosqlite:///{path}"
+    return tmp
+
+
+def admin_headers(client) -> dict:
+    """Authorization header for the seeded admin, logged in through `client` (a TestClient)."""
+    token = client.post("/api/login", json=ADMIN).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def booking_rows(count: int, first: int = 0, **fields) -> list:
+    """Mappings for bookings first..first+count-1: a one-day booking of asset 1 by user 1
+    on BOOKING_START, referenced BENCH-<i>. `fields` override the columns; a callable is
+    called with i."""
+    rows = []
+    for i in range(first, first + count):
+        row = {
+            "reference_code": f"BENCH-{i}", "user_id": 1, "asset_id": 1,
+            "dates": {"start": "2027-01-01T00:00:00Z", "end": "2027-01-02T00:00:00Z"},
+            "start_at": BOOKING_START, "end_at": BOOKING_START + timedelta(days=1), "purpose": "bench",
+        }
+        row.update({name: value(i) if callable(value) else value for name, value in fields.items()})
+        rows.append(row)
+    return rows
+
+
+def add_bookings(db, count: int, first: int = 0, chunk: int = 50000, **fields) -> list:
+    """Insert booking_rows(count, first, **fields) in chunks and commit. Returns the new ids."""
+    from app import models
+
+    ids = []
+    for start in range(first, first + count, chunk):
+        rows = booking_rows(min(chunk, first + count - start), start, **fields)
+        db.bulk_insert_mappings(models.Booking, rows, return_defaults=True)
+        db.commit()
+        ids.extend(row["id"] for row in rows)
+    return ids
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
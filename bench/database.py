@@ -0,0 +1,135 @@
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from bench import common
+
+# Mixed read/write throughput through the API, in-process, each mode on its own throwaway
+# database (journal_mode=WAL persists in the file, so the modes can't share one):
+#   before   - the setup before database.build_engine and the shared get_db: a plain
+#              create_async_engine (SQLite's own settings, default pool) and a second session
+#              per authenticated request, as when auth.py and each router had their own get_db
+#   default  - the shared get_db (one session per request), SQLite's own settings
+#              (rollback journal, synchronous=FULL, no busy_timeout)
+#   tuned    - the shared get_db and the engine factory's pragmas (WAL, synchronous=NORMAL,
+#              busy_timeout, cache_size)
+# sess/req counts sessions opened per request; conn/req counts pool checkouts (a session
+# checks a connection out again after each commit).
+# Each client does 70% reads (asset list, own bookings) and 30% booking creations.
+# Usage: python -m bench.database [concurrent clients] [requests per client]
+
+CLIENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+REQUESTS = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+common.use_tmp_db()
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from fastapi import Depends  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncSession  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+import main  # noqa: E402
+from app import auth, database, models  # noqa: E402
+
+
+def prepare(path, pragmas, legacy=False):
+    url = f"sqlite:///{path}"
+    sync_engine = database.build_engine(url, pragmas=pragmas)
+    models.Base.metadata.create_all(bind=sync_engine)
+    db = sessionmaker(bind=sync_engine)()
+    db.add_all(models.Asset(name=f"Asset {i}", type="Equipment", location="Abuja", cost="1",
+                            total_quantity=10 ** 6) for i in range(200))
+    db.commit()
+    db.close()
+    sync_engine.dispose()
+
+    async_url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if legacy:
+        async_engine = create_async_engine(async_url, connect_args={"check_same_thread": False})
+    else:
+        async_engine = database.build_engine(async_url, is_async=True, pragmas=pragmas)
+    return async_engine, async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False)
+
+
+async def legacy_get_db():
+    # What auth.py's own get_db was: a dependency distinct from the routers' one, so FastAPI
+    # opened a second session for it
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+
+async def legacy_get_current_user(token: str = Depends(auth.oauth2_scheme), db=Depends(legacy_get_db)):
+    return await auth.get_current_user(token, db)
+
+
+async def run(mode, pragmas, legacy=False):
+    async_engine, session_factory = prepare(os.path.abspath(f"{mode}.db"), pragmas, legacy)
+    sessions = []
+    checkouts = []
+
+    def counting_session():
+        sessions.append(1)
+        return session_factory()
+
+    database.AsyncSessionLocal = counting_session
+    main.app.dependency_overrides.clear()
+    if legacy:
+        main.app.dependency_overrides[auth.get_current_user] = legacy_get_current_user
+    event.listen(async_engine.sync_engine, "checkout", lambda *args: checkouts.append(1))
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        tokens = []
+        for i in range(CLIENTS):
+            response = await client.post("/api/register", json={"email": f"bench{i}@fhsa.org", "password": "bench", "business_name": "Bench"})
+            tokens.append(response.json()["access_token"])
+        sessions.clear()
+        checkouts.clear()
+
+        statuses = []
+        latencies = []
+
+        async def worker(n, token):
+            rng = random.Random(n)
+            headers = {"Authorization": f"Bearer {token}"}
+            for i in range(REQUESTS):
+                roll = rng.random()
+                started = time.perf_counter()
+                try:
+                    if roll < 0.4:
+                        response = await client.get("/api/assets", params={"limit": 50})
+                    elif roll < 0.7:
+                        response = await client.get("/api/bookings", headers=headers)
+                    else:
+                        start = datetime(2027, 1, 1) + timedelta(hours=n * REQUESTS + i)
+                        body = {
+                            "asset_id": rng.randint(1, 200),
+                            "dates": {"start": start.isoformat() + "Z", "end": (start + timedelta(hours=1)).isoformat() + "Z"},
+                            "purpose": "bench",
+                        }
+                        response = await client.post("/api/bookings", json=body, headers=headers)
+                    statuses.append(response.status_code)
+                except Exception:
+                    # e.g. "database is locked" when a reader and the writer collide
+                    statuses.append("error")
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n, token) for n, token in enumerate(tokens)))
+        elapsed = time.perf_counter() - started
+    await async_engine.dispose()
+
+    ok = statuses.count(200)
+    print(f"{mode:<8} {ok / elapsed:>8.1f} {ok:>6} {len(statuses) - ok:>7} {common.percentile(latencies, 0.5):>8.1f} "
+          f"{common.percentile(latencies, 0.99):>8.1f} {len(sessions) / len(statuses):>9.2f} {len(checkouts) / len(statuses):>9.2f}")
+
+
+if __name__ == "__main__":
+    print(f"clients={CLIENTS} requests/client={REQUESTS} pool_size={database.POOL_SETTINGS['pool_size']} "
+          f"max_overflow={database.POOL_SETTINGS['max_overflow']}")
+    print(f"{'mode':<8} {'req/s':>8} {'ok':>6} {'failed':>7} {'p50 ms':>8} {'p99 ms':>8} {'sess/req':>9} {'conn/req':>9}")
+    asyncio.run(run("before", {}, legacy=True))
+    asyncio.run(run("default", {}))
+    asyncio.run(run("tuned", None))
@@ -0,0 +1,47 @@
+import asyncio
+import sys
+import time
+import tracemalloc
+from bench import common
+
+# Streams the bookings export behind GET /api/admin/export/bookings (CSV and NDJSON) on a
+# throwaway database of growing size and reports rows/s and the peak Python memory
+# allocated while streaming, which should stay about the same whatever the row count.
+# The body is consumed chunk by chunk straight from export.stream(): TestClient would
+# buffer the whole response and measure itself instead.
+# Usage: python -m bench.export [bookings...]
+
+SIZES = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+
+common.use_tmp_db()
+
+import main  # noqa: E402
+from app import export  # noqa: E402
+from app.database import SessionLocal, async_engine  # noqa: E402
+
+
+async def consume(fmt):
+    received = 0
+    async for chunk in export.stream("bookings", fmt):
+        received += len(chunk.encode())
+    await async_engine.dispose()
+    return received
+
+
+if __name__ == "__main__":
+    main.seed_db()
+    db = SessionLocal()
+    total = 0
+    print(f"{'rows':>8} {'format':<7} {'s':>7} {'rows/s':>9} {'MB':>8} {'peak MB':>8}")
+    for size in SIZES:
+        common.add_bookings(db, size - total, total, asset_id=lambda i: 1 + i % 6, purpose="bench export", total_amount="1000")
+        total = size
+        for fmt in ("csv", "ndjson"):
+            tracemalloc.start()
+            started = time.perf_counter()
+            received = asyncio.run(consume(fmt))
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{size:>8} {fmt:<7} {elapsed:>7.2f} {size / elapsed:>9.0f} {received / 1e6:>8.1f} {peak / 1e6:>8.1f}")
+    db.close()
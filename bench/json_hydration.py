@@ -0,0 +1,92 @@
+import json
+import sys
+import time
+from bench import common
+
+# Cost of hydrating JSON columns, on a throwaway database: N bookings (dates) with two
+# audits each (details) and N assets (specs, images, duration_options, availability).
+#   legacy        - SQLAlchemy's JSON type, then the json.loads repair pass the crud
+#                   functions used to run over every row
+#   codec/json    - JSONCodec with the stdlib json module
+#   codec/orjson  - JSONCodec with orjson (what the app uses)
+# Usage: python -m bench.json_hydration [rows]
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+REPEAT = 5
+
+common.use_tmp_db()
+
+from sqlalchemy import JSON, Column, Integer, MetaData, Table, select  # noqa: E402
+import main  # noqa: E402
+from app import json_codec, models  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+
+COLUMNS = {
+    "bookings": ["dates"],
+    "booking_audits": ["details"],
+    "assets": ["specs", "images", "duration_options", "availability"],
+}
+
+
+def tables(json_type):
+    metadata = MetaData()
+    return [
+        Table(name, metadata, Column("id", Integer, primary_key=True), *(Column(c, json_type) for c in columns))
+        for name, columns in COLUMNS.items()
+    ]
+
+
+def repair(value):
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return {}
+    return value
+
+
+def hydrate(json_type, repair_pass=False):
+    with engine.connect() as conn:
+        for table in tables(json_type):
+            for row in conn.execute(select(table)):
+                if repair_pass:
+                    [repair(value) for value in row[1:]]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - started) * 1000 / REPEAT
+
+
+if __name__ == "__main__":
+    main.models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.bulk_insert_mappings(models.Asset, [
+        {"name": f"Asset {i}", "type": "Equipment", "location": "Abuja", "cost": "1000",
+         "specs": {"capacity": "50kg", "power": "2000W", "dimensions": {"w": 120, "h": 80}},
+         "images": [f"https://example.org/{i}/{n}.jpg" for n in range(3)], "duration_options": ["day", "week"],
+         "availability": {"days": ["Mon", "Tue", "Wed", "Thu", "Fri"]}}
+        for i in range(ROWS)
+    ])
+    ids = common.add_bookings(db, ROWS, asset_id=lambda i: 1 + i % ROWS)
+    db.bulk_insert_mappings(models.BookingAudit, [
+        {"booking_id": booking_id, "action": "Status Updated", "details": {"from": "pending", "to": "paid"}}
+        for booking_id in ids for _ in range(2)
+    ])
+    db.commit()
+    db.close()
+
+    values = ROWS * (len(COLUMNS["bookings"]) + 2 * len(COLUMNS["booking_audits"]) + len(COLUMNS["assets"]))
+    print(f"rows={ROWS} json values={values}")
+    print(f"{'mode':<14} {'ms':>9} {'us/value':>9}")
+    results = [("legacy", timed(lambda: hydrate(JSON, repair_pass=True)))]
+    if json_codec.orjson is not None:
+        results.append(("codec/orjson", timed(lambda: hydrate(json_codec.JSONCodec))))
+    fast = json_codec.loads, json_codec.DecodeError
+    json_codec.loads, json_codec.DecodeError = json.loads, ValueError
+    results.append(("codec/json", timed(lambda: hydrate(json_codec.JSONCodec))))
+    json_codec.loads, json_codec.DecodeError = fast
+    for mode, ms in results:
+        print(f"{mode:<14} {ms:>9.1f} {ms * 1000 / values:>9.2f}")
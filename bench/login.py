@@ -0,0 +1,73 @@
+import asyncio
+import sys
+import time
+from bench import common
+
+# Login throughput and the latency of an unrelated endpoint (GET /api/assets/{id}) while
+# many logins run at once, with bcrypt inline on the event loop vs on the hashing pool.
+# Runs in-process against a throwaway database.
+# Usage: python -m bench.login [concurrent logins] [logins per client]
+
+CLIENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+LOGINS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+common.use_tmp_db()
+
+import httpx  # noqa: E402
+import main  # noqa: E402
+from app import auth  # noqa: E402
+from app.database import async_engine  # noqa: E402
+
+
+async def verify_inline(plain_password, hashed_password):
+    # What login did before: bcrypt straight on the event loop
+    return auth.verify_password(plain_password, hashed_password)
+
+
+async def run(mode):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        statuses = []
+        probe_ms = []
+        done = asyncio.Event()
+
+        async def login_client():
+            for _ in range(LOGINS):
+                try:
+                    response = await client.post("/api/login", json=common.ADMIN)
+                    statuses.append(response.status_code)
+                except Exception:
+                    # e.g. "database is locked" when a stalled loop holds a write transaction open
+                    statuses.append("error")
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/api/assets/1")
+                probe_ms.append((time.perf_counter() - started) * 1000)
+                await asyncio.sleep(0.005)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login_client() for _ in range(CLIENTS)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+    # Pooled connections belong to this event loop
+    await async_engine.dispose()
+
+    ok = statuses.count(200)
+    print(f"{mode:<7} {ok / elapsed:>9.1f} {ok:>6} {statuses.count(503):>6} {statuses.count('error'):>6} "
+          f"{common.percentile(probe_ms, 0.5):>9.1f} {common.percentile(probe_ms, 0.99):>9.1f} {len(probe_ms):>7}")
+
+
+if __name__ == "__main__":
+    main.models.Base.metadata.create_all(bind=main.engine)
+    main.seed_db()
+    pool_verify = auth.verify_password_async
+    print(f"workers={auth.PASSWORD_HASH_WORKERS} queue={auth.PASSWORD_HASH_QUEUE} clients={CLIENTS} logins/client={LOGINS}")
+    print(f"{'mode':<7} {'logins/s':>9} {'ok':>6} {'503':>6} {'errors':>6} {'probe p50':>9} {'probe p99':>9} {'probes':>7}")
+    auth.verify_password_async = verify_inline
+    asyncio.run(run("inline"))
+    auth.verify_password_async = pool_verify
+    asyncio.run(run("pool"))
@@ -0,0 +1,59 @@
+import sys
+import time
+from datetime import datetime, timedelta
+from bench import common
+
+# Cost of fetching one page of the booking list at increasing depth, OFFSET vs keyset
+# cursor, on a throwaway database. Times the page query itself (same ORDER BY, 100 rows).
+# Usage: python -m bench.pagination [bookings]
+
+BOOKINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+PAGE = 100
+REPEAT = 20
+
+common.use_tmp_db()
+
+from sqlalchemy import tuple_  # noqa: E402
+import main  # noqa: E402
+from app import models  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+
+order = (models.Booking.created_at.desc(), models.Booking.id.desc())
+
+
+def offset_page(db, depth):
+    return db.query(models.Booking).order_by(*order).offset(depth).limit(PAGE).all()
+
+
+def keyset_page(db, before):
+    query = db.query(models.Booking)
+    if before is not None:
+        query = query.filter(tuple_(models.Booking.created_at, models.Booking.id) < tuple_(*before))
+    return query.order_by(*order).limit(PAGE).all()
+
+
+def timed(fn):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - started) * 1000 / REPEAT
+
+
+if __name__ == "__main__":
+    main.models.Base.metadata.create_all(bind=main.engine)
+    db = SessionLocal()
+    start = datetime(2026, 1, 1)
+    common.add_bookings(db, BOOKINGS, status="returned", created_at=lambda i: start + timedelta(seconds=i), updated_at=start)
+
+    print(f"bookings={BOOKINGS} page={PAGE}")
+    print(f"{'depth':>8} {'offset ms':>10} {'keyset ms':>10}")
+    for depth in (0, BOOKINGS // 10, BOOKINGS // 2, BOOKINGS - PAGE):
+        # The cursor a client would hold at this depth: the last row of the previous page
+        before = None
+        if depth:
+            row = offset_page(db, depth - 1)[0]
+            before = (row.created_at, row.id)
+        assert [b.id for b in offset_page(db, depth)] == [b.id for b in keyset_page(db, before)]
+        db.expunge_all()
+        print(f"{depth:>8} {timed(lambda: offset_page(db, depth)):>10.2f} {timed(lambda: keyset_page(db, before)):>10.2f}")
+    db.close()
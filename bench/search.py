@@ -0,0 +1,76 @@
+import random
+import sys
+import time
+from bench import common
+
+# Search over a catalog of tens of thousands of assets, on a throwaway database:
+#   fts   - the ranked FTS5 query behind GET /api/assets?search=... (first 100 hits)
+#   like  - LIKE '%word%' over the same fields, unranked, stopping at 100 hits
+#   http  - the whole GET /api/assets?search=... request, in-process
+# Usage: python -m bench.search [assets] [queries]
+
+ASSETS = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+QUERIES = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+common.use_tmp_db()
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import or_  # noqa: E402
+import main  # noqa: E402
+from app import models, search  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+
+EQUIPMENT = ["mixer", "oven", "truck", "tractor", "pump", "grinder", "dryer", "freezer", "press", "mill",
+             "harvester", "sealer", "planter", "sprayer", "thresher", "incubator", "smoker", "extruder",
+             "boiler", "chiller", "generator", "trailer", "van", "weigher", "sorter", "peeler", "slicer",
+             "roaster", "fryer", "kneader", "sheller", "dehuller", "cooler", "tank", "silo", "crate"]
+TYPES = ["Equipment", "Processing", "Logistics", "Machinery", "Cold Storage", "Packaging"]
+FEATURES = ["solar", "diesel", "electric", "industrial", "commercial", "portable", "heavy", "compact",
+            "stainless", "automatic", "manual", "refrigerated", "mobile", "large", "small", "double"]
+PLACES = ["Garki", "Wuse", "Maitama", "Kuje", "Kwali", "Gwagwalada", "Bwari", "Lugbe", "Karu", "Nyanya"]
+# Filler vocabulary for descriptions, so common words don't match half the catalog
+FILLER = [f"w{n:04d}" for n in range(5000)]
+TERMS = ["tractor", "cold storage", "diesel pump", "Kuje", "harv", "industrial mixer 50kg", "w0042"]
+
+
+def like_search(db, term):
+    fields = (models.Asset.name, models.Asset.type, models.Asset.location, models.Asset.description)
+    query = db.query(models.Asset)
+    for word in search.terms(term):
+        query = query.filter(or_(*(field.contains(word) for field in fields)))
+    return query.order_by(models.Asset.id).limit(100).all()
+
+
+def timed(fn):
+    started = time.perf_counter()
+    for _ in range(QUERIES):
+        result = fn()
+    return (time.perf_counter() - started) * 1000 / QUERIES, result
+
+
+if __name__ == "__main__":
+    rng = random.Random(1)
+    db = SessionLocal()
+    for chunk in range(0, ASSETS, 10000):
+        db.bulk_insert_mappings(models.Asset, [
+            {"name": f"{rng.choice(FEATURES).title()} {rng.choice(EQUIPMENT).title()} {i}", "type": rng.choice(TYPES),
+             "location": f"{rng.choice(PLACES)}, Abuja",
+             "description": " ".join(rng.choices(FILLER, k=20) + rng.choices(FEATURES + EQUIPMENT, k=2)),
+             "specs": {"capacity": f"{rng.randint(1, 100)}kg", "power": rng.choice(["Diesel", "Solar", "Grid"])},
+             "cost": "1000", "total_quantity": 1}
+            for i in range(chunk, min(chunk + 10000, ASSETS))
+        ])
+    db.commit()
+    started = time.perf_counter()
+    indexed = search.rebuild(db)
+    db.commit()
+    print(f"indexed {indexed} assets in {time.perf_counter() - started:.1f}s")
+
+    with TestClient(main.app) as client:
+        print(f"{'search':<24} {'hits':>5} {'fts ms':>8} {'like ms':>8} {'http ms':>8}")
+        for term in TERMS:
+            fts_ms, hits = timed(lambda: search.ranked(db, db.query(models.Asset), term).limit(100).all())
+            like_ms, _ = timed(lambda: like_search(db, term))
+            http_ms, _ = timed(lambda: client.get("/api/assets", params={"search": term}))
+            print(f"{term:<24} {len(hits):>5} {fts_ms:>8.2f} {like_ms:>8.2f} {http_ms:>8.2f}")
+    db.close()
@@ -0,0 +1,83 @@
+import asyncio
+import sys
+import time
+from datetime import timedelta
+from bench import common
+
+# Time to turn N booking list rows (schemas.BookingSummary, loaded as GET /api/bookings
+# loads them) into a JSON body, on a throwaway database; the query is not timed.
+#   stdlib    - what FastAPI does with a response_model on the releases requirements.txt
+#               allows: a model per row, validated again, jsonable_encoder, json.dumps
+#   fastapi   - the installed FastAPI's own path: a model per row, validated again and
+#               dumped by pydantic (FastAPI >= 0.128 only)
+#   adapters  - the endpoint: prebuilt TypeAdapters validate the rows and dump the bytes
+# Usage: python -m bench.serialization [bookings...]
+
+SIZES = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+REPEAT = 5
+
+common.use_tmp_db()
+
+from fastapi import routing  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+import main  # noqa: E402
+from app import crud, models, schemas, serialization  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.routers import business  # noqa: E402
+
+route = next(r for r in business.router.routes if getattr(r, "path", None) == "/api/bookings" and "GET" in r.methods)
+field = route.response_field
+dump_json = "dump_json" in routing.serialize_response.__code__.co_varnames
+
+
+def stdlib(bookings):
+    models_ = [schemas.BookingSummary.model_validate(b) for b in bookings]
+    value, _ = field.validate(models_, {}, loc=("response",))
+    return JSONResponse(jsonable_encoder(value)).body
+
+
+def fastapi(bookings):
+    models_ = [schemas.BookingSummary.model_validate(b) for b in bookings]
+    return asyncio.run(routing.serialize_response(field=field, response_content=models_, dump_json=True))
+
+
+def adapters(bookings):
+    return serialization.response(schemas.BookingSummary, serialization.validate(schemas.BookingSummary, bookings)).body
+
+
+def timed(fn, bookings):
+    fn(bookings)
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        body = fn(bookings)
+    return (time.perf_counter() - started) * 1000 / REPEAT, len(body)
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    start = common.BOOKING_START
+    db.bulk_insert_mappings(models.User, [
+        {"id": 100 + i, "email": f"bench{i}@example.org", "first_name": "Bench", "last_name": str(i),
+         "business_name": f"Farm {i}", "phone": "08000000000", "password": "x", "role": "user", "status": "active"}
+        for i in range(50)
+    ])
+    db.bulk_insert_mappings(models.Asset, [
+        {"id": 100 + i, "name": f"Asset {i}", "type": "Equipment", "location": "Abuja", "cost": "1000",
+         "images": [f"https://example.org/{i}/{n}.jpg" for n in range(3)]}
+        for i in range(50)
+    ])
+    common.add_bookings(
+        db, max(SIZES), user_id=lambda i: 100 + i % 50, asset_id=lambda i: 100 + i % 50, total_amount="1000",
+        created_at=lambda i: start + timedelta(minutes=i),
+    )
+
+    modes = [("stdlib", stdlib)] + ([("fastapi", fastapi)] if dump_json else []) + [("adapters", adapters)]
+    print(f"{'bookings':>8} {'mode':<9} {'ms':>9} {'us/row':>8} {'bytes':>9}")
+    for size in SIZES:
+        bookings = crud.get_bookings(db, limit=size)
+        for mode, fn in modes:
+            ms, length = timed(fn, bookings)
+            print(f"{size:>8} {mode:<9} {ms:>9.1f} {ms * 1000 / size:>8.1f} {length:>9}")
+        db.expunge_all()
+    db.close()
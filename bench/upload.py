@@ -0,0 +1,72 @@
+import asyncio
+import os
+import shutil
+import sys
+import time
+import uuid
+from bench import common
+
+# POST /api/upload/ with the same N MB file, UPLOADS times, in-process (httpx ASGI transport):
+#   legacy    - the old handler: UploadFile, then shutil.copyfileobj on the event loop,
+#               every upload under a fresh uuid
+#   streamed  - the endpoint: parsed as it arrives, hashed and written on the worker pool,
+#               stored content-addressed
+# Reports time per upload, the longest event loop stall seen by a 1 ms ticker meanwhile,
+# and the disk used in the upload directory afterwards.
+# Usage: python -m bench.upload [megabytes] [uploads]
+
+MEGABYTES = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+UPLOADS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+common.use_tmp_db()  # uploads go to ./static/uploads there
+os.environ.setdefault("UPLOAD_MAX_BYTES", str((MEGABYTES + 1) * 1024 * 1024))
+
+import httpx  # noqa: E402
+from fastapi import File, UploadFile  # noqa: E402
+import main  # noqa: E402
+from app.routers import upload  # noqa: E402
+
+
+@main.app.post("/bench/legacy-upload")
+async def legacy_upload(file: UploadFile = File(...)):
+    path = os.path.join(upload.UPLOAD_DIR, f"{uuid.uuid4()}{os.path.splitext(file.filename)[1]}")
+    with open(path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+    return {"url": path}
+
+
+async def ticker(stalls, stop):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        stalls.append(time.perf_counter() - started - 0.001)
+
+
+def disk_used():
+    return sum(entry.stat().st_size for entry in os.scandir(upload.UPLOAD_DIR) if entry.is_file())
+
+
+async def run(path, data):
+    stalls, stop = [], asyncio.Event()
+    task = asyncio.create_task(ticker(stalls, stop))
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        started = time.perf_counter()
+        for _ in range(UPLOADS):
+            response = await client.post(path, files={"file": ("photo.jpg", data, "image/jpeg")})
+            assert response.status_code == 200, response.text
+        elapsed = time.perf_counter() - started
+    stop.set()
+    await task
+    return elapsed / UPLOADS, max(stalls)
+
+
+if __name__ == "__main__":
+    data = os.urandom(MEGABYTES * 1024 * 1024)
+    print(f"file={MEGABYTES} MB uploads={UPLOADS}")
+    print(f"{'mode':<9} {'ms/upload':>10} {'max stall ms':>13} {'disk MB':>8}")
+    for mode, path in (("legacy", "/bench/legacy-upload"), ("streamed", "/api/upload/")):
+        shutil.rmtree(upload.UPLOAD_DIR)
+        os.makedirs(upload.UPLOAD_DIR)
+        per_upload, stall = asyncio.run(run(path, data))
+        print(f"{mode:<9} {per_upload * 1000:>10.1f} {stall * 1000:>13.1f} {disk_used() / 2**20:>8.1f}")
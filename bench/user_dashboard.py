@@ -0,0 +1,69 @@
+import sys
+import time
+from datetime import timedelta
+from bench import common
+
+# Queries and time per GET /api/user/dashboard for a user with many bookings, on a
+# throwaway database:
+#   legacy   - the four COUNT queries the endpoint used to run, called directly
+#   full     - the endpoint without a validator: version lookup + one GROUP BY
+#   304      - the endpoint with a matching If-None-Match: version lookup only
+# Usage: python -m bench.user_dashboard [bookings] [calls]
+
+BOOKINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+CALLS = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+common.use_tmp_db()
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+import main  # noqa: E402
+from app import models  # noqa: E402
+from app.database import SessionLocal, engine, async_engine  # noqa: E402
+
+queries = []
+for counted in (engine, async_engine.sync_engine):
+    event.listen(counted, "before_cursor_execute", lambda *args: queries.append(1))
+
+
+def legacy_stats(db, user_id):
+    total = db.query(models.Booking).filter(models.Booking.user_id == user_id).count()
+    pending = db.query(models.Booking).filter(models.Booking.user_id == user_id, models.Booking.status == "pending").count()
+    active = db.query(models.Booking).filter(models.Booking.user_id == user_id, models.Booking.status.in_(["in_possession", "paid"])).count()
+    completed = db.query(models.Booking).filter(models.Booking.user_id == user_id, models.Booking.status == "returned").count()
+    return {"total_bookings": total, "pending_bookings": pending, "active_bookings": active, "completed_bookings": completed}
+
+
+def measure(label, call):
+    queries.clear()
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        call()
+    elapsed = (time.perf_counter() - started) * 1000 / CALLS
+    print(f"{label:<8} {len(queries) / CALLS:>9.1f} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    with TestClient(main.app) as client:
+        token = client.post("/api/register", json={"email": "bench@fhsa.org", "password": "bench", "business_name": "Bench"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        user_id = client.get("/api/user", headers=headers).json()["id"]
+
+        db = SessionLocal()
+        statuses = ["pending", "paid", "in_possession", "returned", "cancelled"]
+        common.add_bookings(
+            db, BOOKINGS, user_id=lambda i: user_id if i % 4 == 0 else 1, status=lambda i: statuses[i % len(statuses)],
+            created_at=common.BOOKING_START, updated_at=lambda i: common.BOOKING_START + timedelta(seconds=i),
+        )
+
+        first = client.get("/api/user/dashboard", headers=headers)
+        assert first.json() == legacy_stats(db, user_id), (first.json(), legacy_stats(db, user_id))
+        etag = first.headers["etag"]
+        assert client.get("/api/user/dashboard", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+        print(f"bookings={BOOKINGS} (user has {first.json()['total_bookings']}) calls={CALLS}")
+        print(f"{'call':<8} {'queries':>9} {'ms/call':>9}")
+        measure("legacy", lambda: legacy_stats(db, user_id))
+        measure("full", lambda: client.get("/api/user/dashboard", headers=headers))
+        measure("304", lambda: client.get("/api/user/dashboard", headers={**headers, "If-None-Match": etag}))
+        db.close()
@@ -0,0 +1,47 @@
+import time
+from bench import common
+
+# Regression check for the catalog's conditional GET (crud.get_catalog_version), on a
+# throwaway database: after an edit takes an asset out of a filtered list, replaying the
+# list's Last-Modified in If-Modified-Since must not get a 304, and neither must its ETag.
+# Usage: python check_catalog_validators.py
+
+common.use_tmp_db()
+
+from fastapi.testclient import TestClient  # noqa: E402
+import main  # noqa: E402
+
+LIST = "/api/assets?location=Abuja&type=Equip"
+
+
+def check():
+    with TestClient(main.app) as client:
+        headers = common.admin_headers(client)
+        # Last-Modified is only advertised once its second is over
+        time.sleep(1.1)
+
+        before = client.get(LIST)
+        ids = [asset["id"] for asset in before.json()]
+        assert len(ids) == 2, ids
+        last_modified, etag = before.headers["Last-Modified"], before.headers["ETag"]
+        assert client.get(LIST, headers={"If-Modified-Since": last_modified}).status_code == 304
+
+        # Edit one of them out of the list
+        edited = client.put(f"/api/assets/{ids[-1]}", json={"type": "Pump"}, headers=headers)
+        assert edited.status_code == 200, edited.text
+        time.sleep(1.1)
+
+        replayed = client.get(LIST, headers={"If-Modified-Since": last_modified})
+        assert replayed.status_code == 200, "If-Modified-Since got a 304 for a changed list"
+        assert [asset["id"] for asset in replayed.json()] == ids[:1]
+        assert replayed.headers["Last-Modified"] != last_modified
+        assert client.get(LIST, headers={"If-None-Match": etag}).status_code == 200
+
+        # And an unchanged list still revalidates
+        again = client.get(LIST, headers={"If-Modified-Since": replayed.headers["Last-Modified"]})
+        assert again.status_code == 304, again.status_code
+    print("Catalog validators OK.")
+
+
+if __name__ == "__main__":
+    check()
@@ -0,0 +1,50 @@
+import json
+from sqlalchemy import text
+from app.database import engine
+from app import models
+from app.json_codec import JSONCodec, decode, dumps
+
+# Rewrites JSON columns whose rows were stored double-encoded (a JSON string holding the
+# real object or array) as plain JSON, so they no longer need unwrapping on every read.
+# Old audit rows whose details are a bare message string get the {"message": ...} shape
+# the API returns for them. Safe to run more than once.
+
+# Columns where a plain string is wrapped into an object under this key
+WRAP_STRINGS = {("booking_audits", "details"): "message"}
+
+def json_columns():
+    for table in models.Base.metadata.sorted_tables:
+        for column in table.columns:
+            if isinstance(column.type, JSONCodec):
+                yield table, column
+
+def fix_double_encoded_json():
+    with engine.begin() as conn:
+        for table, column in json_columns():
+            rows = conn.execute(text(
+                f"SELECT id, {column.name} FROM {table.name} WHERE {column.name} LIKE '\"%'"
+            )).fetchall()
+            fixed = 0
+            for row_id, raw in rows:
+                try:
+                    if not isinstance(json.loads(raw), str):
+                        continue
+                    value = decode(raw)
+                except ValueError:
+                    print(f"{table.name}.{column.name} id={row_id}: not valid JSON, left as is")
+                    continue
+                if isinstance(value, str):
+                    key = WRAP_STRINGS.get((table.name, column.name))
+                    if key is None:
+                        continue  # a genuine JSON string
+                    value = {key: value}
+                conn.execute(
+                    text(f"UPDATE {table.name} SET {column.name} = :value WHERE id = :id"),
+                    {"value": dumps(value), "id": row_id},
+                )
+                fixed += 1
+            print(f"{table.name}.{column.name}: {fixed} of {len(rows)} candidate rows rewritten")
+    print("JSON columns checked.")
+
+if __name__ == "__main__":
+    fix_double_encoded_json()
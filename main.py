@@ -1,5 +1,6 @@
 from fastapi import FastAPI
-from app import crud, schemas
+from app.logging_config import setup_logging
+from app import asset_import, counters, crud, schema, schemas, search
 from app.routers import auth, admin, business, upload # Added upload
 from app.database import SessionLocal, engine
 from app import models
@@ -8,8 +9,15 @@ from fastapi.staticfiles import StaticFiles # Added StaticFiles
 
 from fastapi.middleware.cors import CORSMiddleware
 
+setup_logging()
+
 # Initialize DB Tables
 models.Base.metadata.create_all(bind=engine)
+# Columns and indexes added since an existing database was created (see app/schema.py)
+schema.upgrade(engine)
+search.create_index(engine)
+with SessionLocal() as db:
+    counters.create(db)
 
 app = FastAPI(title="FHSA API")
 
@@ -28,6 +36,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Readable by the frontend: paging cursor for list endpoints
+    expose_headers=["X-Next-Cursor", "Link"],
 )
 
 app.include_router(auth.router)
@@ -144,11 +154,16 @@ def seed_db():
             }
         ]
 
-        for asset_data in assets_data:
-             # Check if asset exists by name to avoid duplicates
-            existing_asset = db.query(models.Asset).filter(models.Asset.name == asset_data["name"]).first()
-            if not existing_asset:
-                crud.create_asset(db, schemas.AssetCreate(**asset_data))
+        # Skip assets that already exist (by name), then insert the rest through the bulk import
+        names = [asset_data["name"] for asset_data in assets_data]
+        existing = {name for (name,) in db.query(models.Asset.name).filter(models.Asset.name.in_(names))}
+        missing = [asset_data for asset_data in assets_data if asset_data["name"] not in existing]
+        report = asset_import.import_assets(db, enumerate(missing, 1))
+        errors = {error["line"]: error["errors"] for error in report["errors"]}
+        for line, asset_data in enumerate(missing, 1):
+            if line in errors:
+                print(f"Could not seed {asset_data['name']}: {errors[line]}")
+            else:
                 print(f"Seeded: {asset_data['name']}")
         
         print("Asset seeding check complete")
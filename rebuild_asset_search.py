@@ -0,0 +1,18 @@
+from app.database import SessionLocal, engine
+from app import search
+
+# Rebuilds the assets_fts full-text index from the assets table, e.g. after assets were
+# edited outside the app. The app keeps it in sync on its own otherwise.
+
+def rebuild_asset_search():
+    search.create_index(engine)
+    db = SessionLocal()
+    try:
+        indexed = search.rebuild(db)
+        db.commit()
+        print(f"Indexed {indexed} assets.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_asset_search()
@@ -0,0 +1,36 @@
+from sqlalchemy import inspect
+from app.database import SessionLocal, engine
+from app import models, counters
+
+# Rebuilds the dashboard_counters rows from the users, assets and bookings tables and
+# reports any counter that had drifted (e.g. after rows were edited outside the app).
+
+def reconcile_counters():
+    table = models.DashboardCounters.__table__
+    if inspect(engine).has_table(table.name):
+        columns = {c["name"] for c in inspect(engine).get_columns(table.name)}
+        if columns != set(table.c.keys()):
+            # Derived data only: recreate with the current columns instead of migrating
+            print("Counters table has an older layout, recreating it...")
+            table.drop(engine)
+    table.create(engine, checkfirst=True)
+    db = SessionLocal()
+    try:
+        created = db.query(models.DashboardCounters.id).first() is not None
+        before = counters.read(db)._asdict() if created else None
+        after = counters.rebuild(db)
+        db.commit()
+
+        if before is None:
+            print("Counters created.")
+        for name, value in after.items():
+            if before is not None and before[name] != value:
+                print(f"{name}: {before[name]} -> {value}")
+            else:
+                print(f"{name}: {value}")
+        print("Counters reconciled.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    reconcile_counters()
@@ -0,0 +1,91 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.availability import IntervalIndex, ACTIVE_STATUSES
+from app import models, crud, schemas
+
+# Fires hundreds of parallel create_booking calls at one asset (plus a second asset
+# alongside it) and checks that no instant of any window is booked beyond capacity.
+# Usage: python stress_booking.py [requests] [capacity]
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+CAPACITY = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    os.chdir(tmp)
+    engine = create_engine(
+        f"sqlite:///{os.path.join(tmp, 'stress.db')}",
+        connect_args={"check_same_thread": False, "timeout": 30},
+        pool_size=64, max_overflow=0,
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    user = models.User(email="stress@fhsa.org", password="x")
+    contended = models.Asset(name="Contended", type="Equipment", location="Abuja", cost="1", total_quantity=CAPACITY)
+    other = models.Asset(name="Other", type="Equipment", location="Abuja", cost="1", total_quantity=CAPACITY)
+    db.add_all([user, contended, other])
+    db.commit()
+    user_id, asset_ids = user.id, [contended.id, other.id]
+    db.close()
+
+    base = datetime(2027, 1, 1)
+    outcomes = Counter()
+    barrier = threading.Barrier(REQUESTS)
+
+    def book(i):
+        # Staggered, overlapping windows so admission depends on the peak, not a plain count
+        start = base + timedelta(hours=i % 48)
+        request = schemas.BookingCreate(
+            asset_id=asset_ids[0] if i % 5 else asset_ids[1],
+            dates={"start": start.isoformat() + "Z", "end": (start + timedelta(hours=36)).isoformat() + "Z"},
+            purpose="stress",
+            quantity=1 + i % 3,
+        )
+        session = Session()
+        barrier.wait()
+        try:
+            crud.create_booking(session, request, user_id)
+            outcomes["admitted"] += 1
+        except HTTPException as e:
+            outcomes[e.status_code] += 1
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=book, args=(i,)) for i in range(REQUESTS)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    db = Session()
+    ok = True
+    for asset_id in asset_ids:
+        rows = db.query(models.Booking.start_at, models.Booking.end_at, models.Booking.quantity).filter(
+            models.Booking.asset_id == asset_id, models.Booking.status.in_(ACTIVE_STATUSES)
+        ).all()
+        peak = max(IntervalIndex(rows).loads, default=0)
+        print(f"asset {asset_id}: {len(rows)} bookings admitted, peak {peak} / capacity {CAPACITY}")
+        ok = ok and peak <= CAPACITY
+    db.close()
+
+    print(f"{REQUESTS} requests in {elapsed:.2f}s: {dict(outcomes)} (400 = sold out, 409 = gave up retrying)")
+    print("PASS: capacity never exceeded" if ok else "FAIL: capacity exceeded")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())